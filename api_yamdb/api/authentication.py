@@ -0,0 +1,252 @@
+import hmac
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.utils import timezone
+from rest_framework.authentication import (
+    BaseAuthentication, get_authorization_header)
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import APIKey, hash_api_key_secret
+
+
+User = get_user_model()
+
+TOKEN_USER_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+
+
+class RoleAccessToken(AccessToken):
+    """Access-токен с ролью пользователя и версией его прав доступа."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in TOKEN_USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        token['auth_version'] = user.auth_version
+        return token
+
+
+class AuthVersionCache:
+    """Кеш версий прав доступа пользователей в памяти процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+
+    def get(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._versions.get(user_id)
+        if cached and cached[1] > now:
+            return cached[0]
+
+        row = User.objects.filter(pk=user_id).values_list(
+            'auth_version', 'is_active').first()
+        version = row[0] if row and row[1] else None
+        ttl = getattr(settings, 'STATELESS_AUTH_VERSION_TTL', 30)
+        with self._lock:
+            self._versions[user_id] = (version, now + ttl)
+        return version
+
+    def forget(self, user_id):
+        with self._lock:
+            self._versions.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._versions.clear()
+
+
+auth_versions = AuthVersionCache()
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT-аутентификация без загрузки пользователя из базы.
+
+    Пользователь собирается из claims токена, выданного RoleAccessToken.
+    Актуальность прав проверяется по auth_version из кеша процесса.
+    Токены без claims роли обрабатываются обычной загрузкой из базы.
+    """
+
+    def get_user(self, validated_token):
+        if 'auth_version' not in validated_token:
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        version = auth_versions.get(user_id)
+        if version is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден или неактивен.',
+                code='user_not_found'
+            )
+        if version != validated_token['auth_version']:
+            raise AuthenticationFailed(
+                'Права пользователя изменились, получите новый токен.',
+                code='token_outdated'
+            )
+
+        claims = {
+            'id': user_id,
+            'is_active': True,
+            'auth_version': version,
+            **{claim: validated_token[claim] for claim in TOKEN_USER_CLAIMS},
+        }
+        # from_db ожидает значения в порядке полей модели, остальные поля
+        # остаются отложенными и догружаются только при обращении к ним.
+        field_names = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in claims
+        ]
+        values = [claims[name] for name in field_names]
+        return User.from_db(User.objects.db, field_names, values)
+
+
+class VerifiedKeyCache:
+    """Кеш проверенных API-ключей в памяти процесса.
+
+    Хранит хеш секрета, области доступа и поля пользователя, поэтому
+    повторные запросы с тем же ключом не обращаются к базе данных.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = {}
+
+    def get(self, prefix):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._keys.get(prefix)
+        if cached and cached['cached_until'] > now:
+            return cached
+
+        api_key = APIKey.objects.select_related('user').filter(
+            prefix=prefix, is_active=True, user__is_active=True
+        ).first()
+        if api_key is None:
+            return None
+        field_names = [
+            field.attname for field in User._meta.concrete_fields
+        ]
+        cached = {
+            'id': api_key.pk,
+            'user_id': api_key.user_id,
+            'hashed_secret': api_key.hashed_secret,
+            'scopes': api_key.scope_set,
+            'expires_at': api_key.expires_at,
+            'field_names': field_names,
+            'values': [
+                getattr(api_key.user, name) for name in field_names
+            ],
+            'cached_until': now + getattr(settings, 'API_KEY_CACHE_TTL', 60),
+        }
+        with self._lock:
+            self._keys[prefix] = cached
+        return cached
+
+    def forget(self, prefix=None, user_id=None):
+        with self._lock:
+            for key, cached in list(self._keys.items()):
+                if key == prefix or cached['user_id'] == user_id:
+                    del self._keys[key]
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+
+class KeyUsageCounter:
+    """Счётчики использования API-ключей.
+
+    Счётчики копятся в памяти и записываются в базу пачкой, когда накопится
+    API_KEY_USAGE_FLUSH_SIZE запросов или пройдёт
+    API_KEY_USAGE_FLUSH_INTERVAL секунд с прошлой записи.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._total = 0
+        self._flushed_at = time.monotonic()
+
+    def record(self, key_id):
+        now = time.monotonic()
+        with self._lock:
+            count, _ = self._pending.get(key_id, (0, None))
+            self._pending[key_id] = (count + 1, timezone.now())
+            self._total += 1
+            due = (
+                self._total >= getattr(
+                    settings, 'API_KEY_USAGE_FLUSH_SIZE', 100)
+                or now - self._flushed_at >= getattr(
+                    settings, 'API_KEY_USAGE_FLUSH_INTERVAL', 60)
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._total = 0
+            self._flushed_at = time.monotonic()
+        for key_id, (count, last_used_at) in pending.items():
+            APIKey.objects.filter(pk=key_id).update(
+                usage_count=F('usage_count') + count,
+                last_used_at=last_used_at
+            )
+        return len(pending)
+
+
+verified_keys = VerifiedKeyCache()
+key_usage = KeyUsageCounter()
+
+
+class APIKeyAuthentication(BaseAuthentication):
+    """Аутентификация внешних сервисов по заголовку `Api-Key <ключ>`.
+
+    Ключ действует от имени своего пользователя. Область `read`
+    разрешает только безопасные методы, для изменений нужна `write`.
+    """
+
+    keyword = 'Api-Key'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Неверный заголовок API-ключа.')
+
+        try:
+            prefix, secret = auth[1].decode().split('.', 1)
+        except (UnicodeError, ValueError):
+            raise AuthenticationFailed('Неверный API-ключ.')
+        cached = verified_keys.get(prefix)
+        if cached is None or not hmac.compare_digest(
+            cached['hashed_secret'], hash_api_key_secret(secret)
+        ):
+            raise AuthenticationFailed('Неверный API-ключ.')
+        if cached['expires_at'] and cached['expires_at'] <= timezone.now():
+            raise AuthenticationFailed('Срок действия API-ключа истёк.')
+
+        scope = APIKey.READ if request.method in SAFE_METHODS else APIKey.WRITE
+        if scope not in cached['scopes']:
+            raise PermissionDenied(
+                f'API-ключ не имеет области доступа `{scope}`.'
+            )
+
+        key_usage.record(cached['id'])
+        user = User.from_db(
+            User.objects.db, cached['field_names'], cached['values']
+        )
+        return user, cached['id']
+
+    def authenticate_header(self, request):
+        return self.keyword
@@ -0,0 +1,235 @@
+import hashlib
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.db.models.sql import Query
+
+from reviews.models import Category, Genre
+
+
+CATALOG_NAMESPACE = 'catalog'
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кеша ответов в текущем процессе."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else None,
+            }
+
+
+response_cache_stats = CacheStats()
+
+
+def get_response_cache():
+    return caches[getattr(settings, 'API_RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def get_generation(namespace):
+    """Текущее поколение данных пространства имён.
+
+    Поколение входит в ключи кеша, поэтому его смена делает недоступными
+    все ранее сохранённые ответы без перебора ключей.
+    """
+    cache = get_response_cache()
+    key = f'api:generation:{namespace}'
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        generation = cache.get(key)
+    return generation
+
+
+def get_generations(namespaces):
+    keys = {
+        f'api:generation:{namespace}': namespace for namespace in namespaces
+    }
+    generations = get_response_cache().get_many(keys)
+    return tuple(
+        generations.get(key) or get_generation(namespace)
+        for key, namespace in sorted(keys.items())
+    )
+
+
+def bump_generation(namespace):
+    get_response_cache().set(
+        f'api:generation:{namespace}', uuid.uuid4().hex, None
+    )
+
+
+def make_response_key(namespace, request):
+    query = '&'.join(sorted(request.GET.urlencode().split('&')))
+    digest = hashlib.md5(
+        f'{request.path}?{query}'.encode('utf-8')
+    ).hexdigest()
+    return f'api:response:{namespace}:{get_generation(namespace)}:{digest}'
+
+
+def get_subqueries(node):
+    """Подзапросы условия: `pk__in=<QuerySet>`, Exists и Subquery."""
+    if isinstance(node, Query):
+        return [node]
+    if isinstance(getattr(node, 'query', None), Query):
+        return [node.query]
+    children = getattr(node, 'children', None)
+    if children is None:
+        get_sources = getattr(node, 'get_source_expressions', None)
+        children = get_sources() if get_sources else ()
+    return [
+        subquery for child in children for subquery in get_subqueries(child)
+    ]
+
+
+def get_query_tables(queryset):
+    """Таблицы, от содержимого которых зависит результат запроса.
+
+    Учитываются соединения и таблицы подзапросов в условиях, например
+    фильтра по жанрам через EXISTS.
+    """
+    tables = set()
+    queries = [queryset.query]
+    while queries:
+        query = queries.pop()
+        tables.add(query.model._meta.db_table)
+        tables.update(join.table_name for join in query.alias_map.values())
+        queries.extend(get_subqueries(query.where))
+    return sorted(tables)
+
+
+def get_cached_count(queryset, counter):
+    """Количество объектов запроса с кешированием по сигнатуре запроса.
+
+    Ключ включает SQL с параметрами и поколения всех таблиц запроса, так
+    что запись в любую из них делает сохранённое значение недоступным.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        # queryset.none() считается без запроса, кешировать нечего.
+        return counter(queryset)
+    tables = get_query_tables(queryset)
+    namespaces = [f'table:{table}' for table in tables]
+    digest = hashlib.md5(
+        repr((sql, params, get_generations(namespaces))).encode('utf-8')
+    ).hexdigest()
+    key = f'api:count:{digest}'
+    cache = get_response_cache()
+    count = cache.get(key)
+    if count is None:
+        count = counter(queryset)
+        cache.set(
+            key, count, getattr(settings, 'API_COUNT_CACHE_TIMEOUT', 60)
+        )
+    return count
+
+
+class SlugIdCache:
+    """Слаги маленького справочника с id и названиями в памяти процесса.
+
+    Справочник читается целиком одним запросом и перечитывается, когда
+    меняется поколение его таблицы `table:<db_table>` или проходит
+    API_SLUG_CACHE_TTL секунд. Поколение сдвигается после сохранения и
+    удаления строк и после импорта, но другие процессы видят его сдвиг
+    только при общем кеше API_RESPONSE_CACHE_ALIAS; с кешем в памяти
+    процесса изменения из них доходят через TTL. Слаг, которого нет в
+    справочнике, ищется в базе. С API_SLUG_CACHE_SHARED прочитанный
+    справочник сохраняется и в общем кеше, и другие процессы берут его
+    оттуда, а не из базы.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._lock = threading.Lock()
+        self._generation = None
+        self._expires = 0
+        self._rows = {}
+
+    def get_rows(self):
+        namespace = f'table:{self.model._meta.db_table}'
+        generation = get_generation(namespace)
+        now = time.monotonic()
+        with self._lock:
+            if generation == self._generation and now < self._expires:
+                return self._rows
+
+        shared = getattr(settings, 'API_SLUG_CACHE_SHARED', False)
+        key = f'api:slugs:{namespace}:{generation}'
+        rows = get_response_cache().get(key) if shared else None
+        if rows is None:
+            rows = {
+                slug: (pk, name) for pk, slug, name
+                in self.model.objects.order_by().values_list(
+                    'pk', 'slug', 'name')
+            }
+            if shared:
+                get_response_cache().set(
+                    key, rows,
+                    getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 300)
+                )
+        with self._lock:
+            self._generation = generation
+            self._expires = now + getattr(settings, 'API_SLUG_CACHE_TTL', 60)
+            self._rows = rows
+        return rows
+
+    def get_row(self, slug):
+        row = self.get_rows().get(slug)
+        if row is None:
+            # Строка могла появиться в другом процессе или при импорте
+            # после чтения справочника.
+            row = self.model.objects.filter(slug=slug).values_list(
+                'pk', 'name').first()
+            if row is not None:
+                with self._lock:
+                    self._rows = {**self._rows, slug: row}
+        return row
+
+    def get_id(self, slug):
+        row = self.get_row(slug)
+        return row[0] if row else None
+
+    def get_instance(self, slug):
+        """Объект с id, названием и слагом, собранный без запроса."""
+        row = self.get_row(slug)
+        if row is None:
+            return None
+        return self.model.from_db(
+            self.model.objects.db, ('id', 'name', 'slug'), (*row, slug)
+        )
+
+    def clear(self):
+        with self._lock:
+            self._generation = None
+            self._expires = 0
+            self._rows = {}
+
+
+category_slugs = SlugIdCache(Category)
+genre_slugs = SlugIdCache(Genre)
+slug_caches = {Category: category_slugs, Genre: genre_slugs}
@@ -1,22 +1,84 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
 
+from api.cache import category_slugs, genre_slugs
 from reviews.models import Title
+from reviews.search import get_search_backend
+from users.search import search_usernames
+
+
+GENRE_MATCH_ANY = 'any'
+GENRE_MATCH_ALL = 'all'
+GENRE_MATCH_CHOICES = (
+    (GENRE_MATCH_ANY, 'Любой из жанров'),
+    (GENRE_MATCH_ALL, 'Все жанры'),
+)
 
 
 class TitleFilter(filters.FilterSet):
-    category = filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='iexact'
-    )
-    genre = filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='iexact'
+    category = filters.CharFilter(method='filter_category')
+    genre = filters.CharFilter(method='filter_genre')
+    genre_match = filters.ChoiceFilter(
+        choices=GENRE_MATCH_CHOICES,
+        method='filter_genre_match'
     )
     name = filters.CharFilter(
         field_name='name',
         lookup_expr='icontains'
     )
+    search = filters.CharFilter(method='filter_search')
 
     class Meta:
         model = Title
-        fields = ('category', 'genre', 'name', 'year')
+        fields = (
+            'category', 'genre', 'genre_match', 'name', 'year', 'search'
+        )
+
+    def filter_category(self, queryset, name, value):
+        category_id = category_slugs.get_id(value.strip().lower())
+        if category_id is None:
+            return queryset.none()
+        return queryset.filter(category_id=category_id)
+
+    def filter_genre(self, queryset, name, value):
+        """Жанры через запятую, `genre_match=all` требует все из них.
+
+        Слаги переводятся в id по кешу, и условия проверяются по индексу
+        промежуточной таблицы без соединения с таблицей жанров.
+        """
+        slugs = {
+            slug.strip().lower() for slug in value.split(',') if slug.strip()
+        }
+        if not slugs:
+            return queryset
+        genre_ids = {genre_slugs.get_id(slug) for slug in slugs}
+        match_all = (
+            self.form.cleaned_data.get('genre_match') == GENRE_MATCH_ALL
+        )
+        if match_all and None in genre_ids:
+            return queryset.none()
+        genre_ids.discard(None)
+        if not genre_ids:
+            return queryset.none()
+        return queryset.with_genres(sorted(genre_ids), match_all)
+
+    def filter_genre_match(self, queryset, name, value):
+        # Учитывается в filter_genre.
+        return queryset
+
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск с сортировкой по релевантности."""
+        return get_search_backend().search(queryset, value)
+
+
+class UsernameSearchFilter(SearchFilter):
+    """Поиск пользователей по username через индексы.
+
+    Вместо `username ILIKE '%q%'` по всей таблице запрос `q*` ищется по
+    префиксу, остальные - через индекс n-грамм username.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for term in self.get_search_terms(request):
+            queryset = search_usernames(queryset, term)
+        return queryset
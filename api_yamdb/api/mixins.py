@@ -1,10 +1,145 @@
-from rest_framework import mixins, viewsets
+from django.conf import settings
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import mixins, status, viewsets
 from rest_framework.filters import SearchFilter
+from rest_framework.response import Response
 
+from api.cache import (
+    CATALOG_NAMESPACE, get_response_cache, make_response_key,
+    response_cache_stats)
+from api.pagination import PubDateKeysetPagination
 from api.permissions import IsAdminOrReadOnly
 
 
+class CachedResponseMixin:
+    """Кеширует ответы на GET-запросы списка и объекта.
+
+    Кеш сбрасывается сменой поколения пространства имён при изменении
+    данных, от которых зависят ответы.
+    """
+
+    cache_namespace = CATALOG_NAMESPACE
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        cache = get_response_cache()
+        key = make_response_key(self.cache_namespace, request)
+        data = cache.get(key)
+        if data is not None:
+            response_cache_stats.hit()
+            return Response(data, headers={'X-Cache': 'HIT'})
+
+        response_cache_stats.miss()
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(
+                key,
+                response.data,
+                getattr(settings, 'API_RESPONSE_CACHE_TIMEOUT', 300)
+            )
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class ConditionalGetMixin:
+    """Поддержка условных GET-запросов для списка и объекта.
+
+    Валидаторы считаются по сохранённым метаданным до выполнения
+    основного запроса, поэтому ответ 304 не требует сериализации.
+    """
+
+    def get_list_validators(self):
+        """Возвращает пару (etag, last_modified) для списка."""
+        return None, None
+
+    def get_object_validators(self):
+        """Возвращает пару (etag, last_modified) для объекта."""
+        return None, None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, self.safe_validators(self.get_list_validators),
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve,
+            self.safe_validators(self.get_object_validators),
+            request, *args, **kwargs
+        )
+
+    @staticmethod
+    def safe_validators(getter):
+        # Нечисловой id из URL не должен давать 500: без валидаторов
+        # запрос обрабатывается обычным образом и получает ответ 404.
+        try:
+            return getter()
+        except (TypeError, ValueError):
+            return None, None
+
+    def get_conditional_response(self, handler, validators, request,
+                                 *args, **kwargs):
+        etag, last_modified = validators
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        if etag:
+            response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class KeysetPaginationMixin:
+    """Включает пагинацию по курсору по запросу клиента.
+
+    Курсорный режим выбирается параметром `pagination=cursor` или
+    наличием параметра `cursor`, иначе используется пагинация по умолчанию.
+    """
+
+    keyset_pagination_class = PubDateKeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.use_keyset_pagination():
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
+
+    def use_keyset_pagination(self):
+        request = getattr(self, 'request', None)
+        if request is None:
+            return False
+        query_params = request.query_params
+        return (
+            query_params.get('pagination') == 'cursor'
+            or self.keyset_pagination_class.cursor_query_param in query_params
+        )
+
+
 class ListCreateDestroyViewSet(
+    CachedListMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
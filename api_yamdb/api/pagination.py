@@ -0,0 +1,143 @@
+import base64
+import json
+from urllib import parse
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from api.cache import get_cached_count
+
+
+def estimate_count(queryset):
+    """Оценка количества строк по плану запроса.
+
+    Доступна только для PostgreSQL, для остальных СУБД возвращает None.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_queryset(queryset):
+    """Возвращает пару (количество, признак оценки)."""
+    threshold = getattr(settings, 'API_COUNT_ESTIMATE_THRESHOLD', None)
+    if threshold is not None:
+        estimate = estimate_count(queryset)
+        if estimate is not None and estimate > threshold:
+            return estimate, True
+    return queryset.count(), False
+
+
+class CachedCountPaginator(Paginator):
+    is_estimated = False
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        count, self.is_estimated = get_cached_count(
+            self.object_list, count_queryset
+        )
+        return count
+
+
+class CachedCountPageNumberPagination(PageNumberPagination):
+    """Постраничный вывод с кешированным количеством объектов."""
+
+    django_paginator_class = CachedCountPaginator
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.page.paginator.is_estimated:
+            response['X-Count-Estimated'] = 'true'
+        return response
+
+
+class PubDateKeysetPagination(BasePagination):
+    """Постраничный вывод по курсору (pub_date, id) без OFFSET и COUNT.
+
+    Следующая страница выбирается условием по ключу последнего объекта,
+    поэтому стоимость запроса не зависит от глубины листания.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Неверный курсор.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        queryset = queryset.order_by('-pub_date', '-id')
+        position = self.decode_cursor(request)
+        if position is not None:
+            pub_date, pk = position
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk)
+            )
+        results = list(queryset[:self.page_size + 1])
+        self.next_position = None
+        if len(results) > self.page_size:
+            results = results[:self.page_size]
+            self.next_position = (results[-1].pub_date, results[-1].id)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            querystring = base64.urlsafe_b64decode(
+                encoded.encode('ascii')).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            pub_date = parse_datetime(tokens['d'][0])
+            pk = int(tokens['i'][0])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if pub_date is None:
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, pk
+
+    def encode_cursor(self, position):
+        pub_date, pk = position
+        querystring = parse.urlencode({'d': pub_date.isoformat(), 'i': pk})
+        return base64.urlsafe_b64encode(
+            querystring.encode('ascii')).decode('ascii')
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Курсор следующей страницы.',
+            'schema': {'type': 'string'},
+        }]
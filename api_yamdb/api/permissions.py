@@ -24,5 +24,5 @@ class IsAuthorModeratorAdmin(permissions.BasePermission):
         return request.method in permissions.SAFE_METHODS or (
             request.user.is_admin
             or request.user.is_moderator
-            or (obj.author == request.user)
+            or obj.author_id == request.user.id
         )
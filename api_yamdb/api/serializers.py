@@ -1,12 +1,13 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.shortcuts import get_object_or_404
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.relations import SlugRelatedField
-from rest_framework.validators import ValidationError
+from rest_framework.validators import UniqueValidator, ValidationError
 
+from api.cache import slug_caches
 from api.constants import EMAIL_MAX_LENGTH, USER_MAX_LENGTH
-from api.utils import get_title_model
 from reviews.models import Category, Comment, Genre, Review, Title
 from users.validators import validate_username
 
@@ -19,6 +20,11 @@ class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
         exclude = ('id', )
+        extra_kwargs = {
+            'slug': {'validators': [
+                UniqueValidator(Category.objects.all(), lookup='iexact')
+            ]},
+        }
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -26,15 +32,36 @@ class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         model = Genre
         exclude = ('id', )
+        extra_kwargs = {
+            'slug': {'validators': [
+                UniqueValidator(Genre.objects.all(), lookup='iexact')
+            ]},
+        }
+
+
+class CachedSlugRelatedField(SlugRelatedField):
+    """Связь по слагу, которая находит объект в SlugIdCache без запроса."""
+
+    def __init__(self, **kwargs):
+        super().__init__(slug_field='slug', **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail('invalid')
+        slug_cache = slug_caches[self.queryset.model]
+        instance = slug_cache.get_instance(data.strip().lower())
+        if instance is None:
+            self.fail(
+                'does_not_exist', slug_name=self.slug_field,
+                value=smart_str(data)
+            )
+        return instance
 
 
 class TitleSerializer(serializers.ModelSerializer):
 
-    category = serializers.SlugRelatedField(
-        slug_field='slug', queryset=Category.objects.all()
-    )
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
+    category = CachedSlugRelatedField(queryset=Category.objects.all())
+    genre = CachedSlugRelatedField(
         queryset=Genre.objects.all(),
         many=True,
         required=True,
@@ -45,7 +72,9 @@ class TitleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = (
+            'id', 'name', 'year', 'rating', 'description', 'genre', 'category'
+        )
 
     def to_representation(self, instance):
         rep = super().to_representation(instance)
@@ -75,9 +104,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         if self.context['request'].method == 'POST':
-            title = get_title_model(
-                self.context['view'].kwargs.get('title_id')
-            )
+            title = self.context['view'].get_title_model()
             author = self.context['request'].user
             existing_review = Review.objects.filter(
                 author=author,
@@ -115,6 +142,7 @@ class TokenSerializer(serializers.Serializer):
         confirmation_code = data['confirmation_code']
         if not default_token_generator.check_token(user, confirmation_code):
             raise ValidationError('Введен неверный код подтверждения!')
+        data['user'] = user
         return data
 
 
@@ -125,3 +153,11 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ('username', 'email', 'first_name',
                   'last_name', 'bio', 'role', )
         model = User
+
+    def update(self, instance, validated_data):
+        # Сохраняются только переданные поля: остальные могли измениться в
+        # базе после загрузки пользователя.
+        for attr, value in validated_data.items():
+            setattr(instance, attr, value)
+        instance.save(update_fields=list(validated_data))
+        return instance
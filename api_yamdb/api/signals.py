@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api.authentication import auth_versions, verified_keys
+from api.cache import CATALOG_NAMESPACE, bump_generation
+from reviews.models import Category, Genre, Review, Title
+from users.models import APIKey
+
+
+User = get_user_model()
+
+CATALOG_MODELS = (Category, Genre, Title, Review)
+COUNTED_APPS = ('reviews', 'users')
+
+
+def invalidate_catalog(**kwargs):
+    transaction.on_commit(lambda: bump_generation(CATALOG_NAMESPACE))
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(
+        invalidate_catalog, sender=model,
+        dispatch_uid=f'invalidate_catalog_save_{model.__name__}'
+    )
+    post_delete.connect(
+        invalidate_catalog, sender=model,
+        dispatch_uid=f'invalidate_catalog_delete_{model.__name__}'
+    )
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def invalidate_catalog_on_genre_change(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate_catalog()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(m2m_changed)
+def invalidate_table_counts(sender, **kwargs):
+    """Сбрасывает кешированные COUNT запросов к изменённой таблице."""
+    if sender._meta.app_label not in COUNTED_APPS:
+        return
+    if kwargs.get('action', 'post_').startswith('post_'):
+        namespace = f'table:{sender._meta.db_table}'
+        transaction.on_commit(lambda: bump_generation(namespace))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_auth_version(sender, instance, **kwargs):
+    auth_versions.forget(instance.pk)
+    verified_keys.forget(user_id=instance.pk)
+
+
+@receiver(post_save, sender=APIKey)
+@receiver(post_delete, sender=APIKey)
+def forget_api_key(sender, instance, **kwargs):
+    verified_keys.forget(prefix=instance.prefix)
@@ -0,0 +1,275 @@
+import hashlib
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+
+logger = logging.getLogger(__name__)
+
+
+class SlidingWindowStore(ABC):
+    """Счётчик запросов в скользящем окне.
+
+    Окно приближается двумя соседними интервалами фиксированной длины:
+    запросы прошлого интервала учитываются с весом, равным доле окна,
+    которая ещё не прошла.
+    """
+
+    @abstractmethod
+    def get_many(self, keys):
+        """Значения существующих ключей."""
+
+    @abstractmethod
+    def incr(self, key, timeout):
+        """Увеличивает счётчик, создавая его на timeout секунд."""
+
+    @abstractmethod
+    def add(self, key, value, timeout):
+        """Создаёт ключ, если его нет, возвращает, создан ли он."""
+
+    @abstractmethod
+    def delete(self, key):
+        """Удаляет ключ."""
+
+    def hit(self, key, limit, window):
+        """Учитывает запрос, возвращает пару (разрешён, секунд до повтора)."""
+        now = time.time()
+        bucket = int(now // window)
+        elapsed = now - bucket * window
+        current_key = f'{key}:{bucket}'
+        previous_key = f'{key}:{bucket - 1}'
+        counts = self.get_many((current_key, previous_key))
+        previous = counts.get(previous_key, 0)
+        current = counts.get(current_key, 0)
+        weight = 1 - elapsed / window
+        estimated = previous * weight + current
+        if estimated >= limit:
+            excess = estimated - limit + 1
+            if current < limit and excess <= previous * weight:
+                return False, excess / previous * window
+            return False, window - elapsed
+        self.incr(current_key, window * 2)
+        return True, None
+
+
+class MemoryWindowStore(SlidingWindowStore):
+    """Хранилище счётчиков в памяти текущего процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = {}
+
+    def _get(self, key, now):
+        value, expires = self._data.get(key, (None, 0))
+        if expires <= now:
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def _prune(self, now):
+        for key, (_, expires) in list(self._data.items()):
+            if expires <= now:
+                del self._data[key]
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            values = {key: self._get(key, now) for key in keys}
+        return {key: value for key, value in values.items() if value}
+
+    def incr(self, key, timeout):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._data) > 10000:
+                self._prune(now)
+            value = self._get(key, now)
+            if value is None:
+                self._data[key] = (1, now + timeout)
+            else:
+                self._data[key] = (value + 1, self._data[key][1])
+
+    def add(self, key, value, timeout):
+        now = time.monotonic()
+        with self._lock:
+            if self._get(key, now) is not None:
+                return False
+            self._data[key] = (value, now + timeout)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CacheWindowStore(SlidingWindowStore):
+    """Хранилище счётчиков в кеше Django, общее для всех процессов.
+
+    При недоступности кеша счётчики временно ведутся в памяти процесса.
+    """
+
+    def __init__(self, alias, fallback):
+        self.alias = alias
+        self.fallback = fallback
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_many(self, keys):
+        try:
+            return self.cache.get_many(keys)
+        except Exception:
+            logger.warning('Кеш ограничений недоступен', exc_info=True)
+            return self.fallback.get_many(keys)
+
+    def incr(self, key, timeout):
+        try:
+            if not self.cache.add(key, 1, timeout):
+                try:
+                    self.cache.incr(key)
+                except ValueError:
+                    # Ключ истёк между add и incr.
+                    self.cache.set(key, 1, timeout)
+        except Exception:
+            logger.warning('Кеш ограничений недоступен', exc_info=True)
+            self.fallback.incr(key, timeout)
+
+    def add(self, key, value, timeout):
+        try:
+            return self.cache.add(key, value, timeout)
+        except Exception:
+            logger.warning('Кеш ограничений недоступен', exc_info=True)
+            return self.fallback.add(key, value, timeout)
+
+    def delete(self, key):
+        try:
+            self.cache.delete(key)
+        except Exception:
+            logger.warning('Кеш ограничений недоступен', exc_info=True)
+        self.fallback.delete(key)
+
+
+memory_store = MemoryWindowStore()
+
+
+def get_throttle_store():
+    """Хранилище из настройки API_THROTTLE_CACHE_ALIAS.
+
+    Без настройки счётчики ведутся в памяти процесса.
+    """
+    alias = getattr(settings, 'API_THROTTLE_CACHE_ALIAS', None)
+    if alias is None:
+        return memory_store
+    return CacheWindowStore(alias, memory_store)
+
+
+def parse_rate(rate):
+    """Разбирает частоту вида `5/min` в пару (запросов, секунд)."""
+    num, period = rate.split('/')
+    duration = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}[period[0]]
+    return int(num), duration
+
+
+def make_key(*parts):
+    digest = hashlib.md5(':'.join(parts).encode()).hexdigest()
+    return f'throttle:{parts[0]}:{digest}'
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """Ограничение частоты запросов со скользящим окном.
+
+    Частота берётся из DEFAULT_THROTTLE_RATES по `scope`, по умолчанию
+    запросы считаются по IP-адресу клиента.
+    """
+
+    scope = None
+
+    def get_rate(self):
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_ident_value(self, request):
+        return self.get_ident(request)
+
+    def allow_request(self, request, view):
+        self.wait_seconds = None
+        rate = self.get_rate()
+        ident = self.get_ident_value(request)
+        if rate is None or not ident:
+            return True
+        limit, window = parse_rate(rate)
+        allowed, self.wait_seconds = get_throttle_store().hit(
+            make_key(self.scope, ident), limit, window
+        )
+        return allowed
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class FieldThrottle(SlidingWindowThrottle):
+    """Ограничение по значению поля запроса без учёта регистра."""
+
+    field = None
+
+    def get_ident_value(self, request):
+        data = request.data
+        value = data.get(self.field) if hasattr(data, 'get') else None
+        if not isinstance(value, str):
+            return None
+        return value.strip().lower()
+
+
+class SignUpIPThrottle(SlidingWindowThrottle):
+    scope = 'signup_ip'
+
+
+class SignUpUsernameThrottle(FieldThrottle):
+    scope = 'signup_username'
+    field = 'username'
+
+
+class SignUpEmailThrottle(FieldThrottle):
+    scope = 'signup_email'
+    field = 'email'
+
+
+class TokenIPThrottle(SlidingWindowThrottle):
+    scope = 'token_ip'
+
+
+class TokenUsernameThrottle(FieldThrottle):
+    scope = 'token_username'
+    field = 'username'
+
+
+def get_email_dedupe_key(recipient, subject):
+    return make_key('email', recipient.lower(), subject)
+
+
+def is_duplicate_email(recipient, subject):
+    """Было ли такое письмо поставлено в очередь за последнее окно.
+
+    Окно задаётся настройкой CONFIRMATION_EMAIL_DEDUPE_WINDOW в секундах.
+    Если письмо не удалось поставить в очередь, его нужно забыть вызовом
+    `forget_email`.
+    """
+    window = getattr(settings, 'CONFIRMATION_EMAIL_DEDUPE_WINDOW', 60)
+    if not window:
+        return False
+    key = get_email_dedupe_key(recipient, subject)
+    return not get_throttle_store().add(key, 1, window)
+
+
+def forget_email(recipient, subject):
+    """Снимает отметку о письме, чтобы повторный запрос его отправил."""
+    get_throttle_store().delete(get_email_dedupe_key(recipient, subject))
@@ -4,7 +4,7 @@ from rest_framework.routers import DefaultRouter
 from api.views import (
     CategoryViewSet, CommentViewSet, GenreViewSet,
     ReviewViewSet, TitleViewSet, UserViewSet,
-    signup, token)
+    cache_stats, email_stats, signup, token)
 
 
 router_v1 = DefaultRouter()
@@ -30,7 +30,9 @@ auth_patterns = [
 
 api_v1_urls = [
     path('', include(router_v1.urls)),
-    path('auth/', include(auth_patterns))
+    path('auth/', include(auth_patterns)),
+    path('cache/stats/', cache_stats, name='cache-stats'),
+    path('email/stats/', email_stats, name='email-stats'),
 ]
 
 urlpatterns = [
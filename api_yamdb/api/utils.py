@@ -1,7 +1,9 @@
-from django.shortcuts import get_object_or_404
+import hashlib
 
-from reviews.models import Title
+from django.utils.http import quote_etag
 
 
-def get_title_model(title_id: int) -> Title:
-    return get_object_or_404(Title, id=title_id)
+def make_weak_etag(*parts) -> str:
+    """Слабый ETag по набору значений, однозначно описывающих ответ."""
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return f'W/{quote_etag(digest)}'
@@ -1,28 +1,35 @@
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db import IntegrityError
-from django.db.models import Avg
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import status, viewsets
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import (
+    action, api_view, permission_classes, throttle_classes)
 from rest_framework.exceptions import ValidationError
-from rest_framework.filters import SearchFilter
 from rest_framework.permissions import (
     AllowAny, IsAuthenticated, IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
 
-from api.filters import TitleFilter
-from api.mixins import ListCreateDestroyViewSet, PatchOnlyMixin
+from api.authentication import RoleAccessToken
+from api.cache import (
+    CATALOG_NAMESPACE, get_generation, response_cache_stats)
+from api.filters import TitleFilter, UsernameSearchFilter
+from api.mixins import (
+    CachedListMixin, CachedRetrieveMixin, ConditionalGetMixin,
+    KeysetPaginationMixin, ListCreateDestroyViewSet, PatchOnlyMixin)
 from api.permissions import IsAdmin, IsAdminOrReadOnly, IsAuthorModeratorAdmin
 from api.serializers import (
     CategorySerializer, CommentSerializer, GenreSerializer,
     ReviewSerializer, SignUpSerializer, TitleSerializer,
     TokenSerializer, UserSerializer)
-from reviews.models import Category, Genre, Review, Title
+from api.throttling import (
+    SignUpEmailThrottle, SignUpIPThrottle, SignUpUsernameThrottle,
+    TokenIPThrottle, TokenUsernameThrottle, forget_email,
+    is_duplicate_email)
+from api.utils import make_weak_etag
+from notifications.services import (
+    enqueue_email, get_dispatcher, get_queue_depth)
+from reviews.models import Category, Comment, Genre, Review, Title
 
 
 User = get_user_model()
@@ -38,16 +45,42 @@ class GenreViewSet(ListCreateDestroyViewSet):
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(PatchOnlyMixin, viewsets.ModelViewSet):
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score')).all()
+class TitleViewSet(
+    PatchOnlyMixin,
+    ConditionalGetMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    viewsets.ModelViewSet
+):
+    queryset = Title.objects.select_related(
+        'category').prefetch_related('genre')
     serializer_class = TitleSerializer
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
 
-
-class ReviewViewSet(PatchOnlyMixin, viewsets.ModelViewSet):
+    def get_list_validators(self):
+        # Поколение каталога меняется при любом изменении произведений,
+        # категорий, жанров и отзывов, ETag считается без запросов к базе.
+        return make_weak_etag(
+            'titles', get_generation(CATALOG_NAMESPACE),
+            self.request.get_full_path()
+        ), None
+
+    def get_object_validators(self):
+        version = Title.objects.filter(
+            pk=self.kwargs['pk']).values_list('version', flat=True).first()
+        if version is None:
+            return None, None
+        return make_weak_etag('title', self.kwargs['pk'], version), None
+
+
+class ReviewViewSet(
+    PatchOnlyMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = ReviewSerializer
     permission_classes = (
         IsAuthenticatedOrReadOnly,
@@ -55,19 +88,45 @@ class ReviewViewSet(PatchOnlyMixin, viewsets.ModelViewSet):
     )
 
     def get_title_model(self):
-        title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Title, id=title_id)
+        """Произведение из URL, загружается один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, id=self.kwargs.get('title_id')
+            )
+        return self._title
+
+    def get_list_validators(self):
+        return make_weak_etag(
+            'reviews', get_generation(f'table:{Review._meta.db_table}'),
+            self.request.get_full_path()
+        ), None
+
+    def get_object_validators(self):
+        last_modified = Review.objects.filter(
+            pk=self.kwargs['pk'], title_id=self.kwargs.get('title_id')
+        ).values_list('updated', flat=True).first()
+        if last_modified is None:
+            return None, None
+        return (
+            make_weak_etag('review', self.kwargs['pk'], last_modified),
+            last_modified
+        )
 
     def perform_create(self, serializer):
-        title = self.get_title_model()
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(
+            author=self.request.user, title=self.get_title_model()
+        )
 
     def get_queryset(self):
-        title = self.get_title_model()
-        return title.reviews.all()
+        return self.get_title_model().reviews.with_author_username()
 
 
-class CommentViewSet(PatchOnlyMixin, viewsets.ModelViewSet):
+class CommentViewSet(
+    PatchOnlyMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = CommentSerializer
     permission_classes = (
         IsAuthenticatedOrReadOnly,
@@ -75,16 +134,41 @@ class CommentViewSet(PatchOnlyMixin, viewsets.ModelViewSet):
     )
 
     def get_review_model(self):
-        review_id = self.kwargs.get('review_id')
-        return get_object_or_404(Review, id=review_id)
+        """Отзыв из URL, проверенный на принадлежность произведению."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                id=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id')
+            )
+        return self._review
+
+    def get_list_validators(self):
+        return make_weak_etag(
+            'comments', get_generation(f'table:{Comment._meta.db_table}'),
+            self.request.get_full_path()
+        ), None
+
+    def get_object_validators(self):
+        last_modified = Comment.objects.filter(
+            pk=self.kwargs['pk'],
+            review_id=self.kwargs.get('review_id'),
+            review__title_id=self.kwargs.get('title_id')
+        ).values_list('updated', flat=True).first()
+        if last_modified is None:
+            return None, None
+        return (
+            make_weak_etag('comment', self.kwargs['pk'], last_modified),
+            last_modified
+        )
 
     def perform_create(self, serializer):
-        review = self.get_review_model()
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(
+            author=self.request.user, review=self.get_review_model()
+        )
 
     def get_queryset(self):
-        review = self.get_review_model()
-        return review.comments.all()
+        return self.get_review_model().comments.with_author_username()
 
 
 class UserViewSet(PatchOnlyMixin, viewsets.ModelViewSet):
@@ -94,8 +178,7 @@ class UserViewSet(PatchOnlyMixin, viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = (IsAdmin,)
     lookup_field = 'username'
-    filter_backends = (SearchFilter,)
-    search_fields = ('username',)
+    filter_backends = (UsernameSearchFilter,)
 
     @action(
         methods=['GET', 'PATCH'],
@@ -103,48 +186,61 @@ class UserViewSet(PatchOnlyMixin, viewsets.ModelViewSet):
         permission_classes=(IsAuthenticated,)
     )
     def me(self, request):
+        user = request.user
+        if user.get_deferred_fields():
+            # Пользователь собран из claims токена, профиль показывается и
+            # изменяется по актуальной строке из базы.
+            user = User.objects.get(pk=user.pk)
+
         if request.method == 'PATCH':
             serializer = UserSerializer(
-                request.user,
+                user,
                 data=request.data,
                 partial=True
             )
 
             serializer.is_valid(raise_exception=True)
-            serializer.save(role=request.user.role)
+            serializer.save(role=user.role)
 
-        serializer = UserSerializer(request.user)
+        serializer = UserSerializer(user)
 
         return Response(serializer.data)
 
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([
+    SignUpIPThrottle, SignUpUsernameThrottle, SignUpEmailThrottle
+])
 def signup(request):
     """Регистрация нового пользователя и отправка кода подтверждения."""
     serializer = SignUpSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
 
-    try:
-        user, _ = User.objects.get_or_create(
-            username=request.data['username'],
-            email=request.data['email']
-        )
-
-    except IntegrityError:
+    user = User.objects.get_or_register(
+        serializer.validated_data['username'],
+        serializer.validated_data['email']
+    )
+    if user is None:
         raise ValidationError(
             'Неверное сочетание имени пользователя и email'
         )
 
-    confirmation_code = default_token_generator.make_token(user)
-
-    send_mail(
-        'Подтверждение регистрации на сайте Yamdb!',
-        f'Ваш код: {confirmation_code} для подтверждения регистрации',
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email],
-        fail_silently=False
-    )
+    subject = 'Подтверждение регистрации на сайте Yamdb!'
+    # Код из недавнего письма ещё действителен, повторно его не шлём.
+    if not is_duplicate_email(user.email, subject):
+        confirmation_code = default_token_generator.make_token(user)
+        try:
+            enqueue_email(
+                subject,
+                f'Ваш код: {confirmation_code} для подтверждения регистрации',
+                [user.email]
+            )
+        except Exception:
+            # Письмо не в очереди: повторная регистрация должна его
+            # отправить, а не считаться дубликатом до конца окна.
+            forget_email(user.email, subject)
+            raise
 
     return Response(
         serializer.data,
@@ -154,13 +250,29 @@ def signup(request):
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes([TokenIPThrottle, TokenUsernameThrottle])
 def token(request):
     """Получение токена."""
     serializer = TokenSerializer(data=request.data)
 
     serializer.is_valid(raise_exception=True)
-    user = get_object_or_404(User, username=request.data['username'])
-    token = AccessToken.for_user(user)
+    token = RoleAccessToken.for_user(serializer.validated_data['user'])
     respone = {'token': str(token)}
 
     return Response(respone, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def cache_stats(request):
+    """Статистика кеша ответов текущего процесса."""
+    return Response(response_cache_stats.as_dict(), status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def email_stats(request):
+    """Статистика отправки писем текущего процесса и длина очереди."""
+    stats = get_dispatcher().stats.as_dict()
+    stats['queue_depth'] = get_queue_depth()
+    return Response(stats, status=status.HTTP_200_OK)
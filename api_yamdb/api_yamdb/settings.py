@@ -27,6 +27,7 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'reviews.apps.ReviewsConfig',
     'api.apps.ApiConfig',
+    'notifications.apps.NotificationsConfig',
 ]
 
 MIDDLEWARE = [
@@ -97,26 +98,84 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
+# Поколения данных в кеше API_RESPONSE_CACHE_ALIAS сбрасывают кеши ответов
+# и справочники слагов. Кеш в памяти процесса годится для одного процесса,
+# при нескольких процессах и импорте командами нужен общий кеш, например
+# Redis или Memcached.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+API_RESPONSE_CACHE_ALIAS = 'default'
+
+API_RESPONSE_CACHE_TIMEOUT = 60 * 5
+
+API_COUNT_CACHE_TIMEOUT = 60
+
+API_COUNT_ESTIMATE_THRESHOLD = None
+
+API_SLUG_CACHE_SHARED = False
+
+API_SLUG_CACHE_TTL = 60
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.APIKeyAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CachedCountPageNumberPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_RATES': {
+        'signup_ip': '100/hour',
+        'signup_username': '10/hour',
+        'signup_email': '10/hour',
+        'token_ip': '100/hour',
+        'token_username': '20/hour',
+    },
 }
 
+API_THROTTLE_CACHE_ALIAS = 'default'
+
+CONFIRMATION_EMAIL_DEDUPE_WINDOW = 60
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(days=1),
 }
 
+STATELESS_AUTH_VERSION_TTL = 30
+
+API_KEY_CACHE_TTL = 60
+
+API_KEY_USAGE_FLUSH_SIZE = 100
+
+API_KEY_USAGE_FLUSH_INTERVAL = 60
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 DEFAULT_FROM_EMAIL = 'from@example.com'
 
+EMAIL_DELIVERY_MODE = 'thread'
+
+EMAIL_BATCH_SIZE = 100
+
+EMAIL_FLUSH_INTERVAL = 2
+
+EMAIL_IDLE_INTERVAL = 60
+
+EMAIL_MAX_ATTEMPTS = 5
+
+EMAIL_RETRY_BACKOFF = 60
+
+EMAIL_CLAIM_LEASE = 60 * 5
+
+EMAIL_RETENTION_DAYS = 7
+
 AUTH_USER_MODEL = 'users.User'
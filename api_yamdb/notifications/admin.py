@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import OutgoingEmail
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'subject', 'status', 'attempts',
+                    'next_attempt_at', 'sent_at')
+    search_fields = ('recipient', 'subject')
+    list_filter = ('status',)
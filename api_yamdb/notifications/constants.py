@@ -0,0 +1,3 @@
+SUBJECT_MAX_LENGTH = 255
+EMAIL_MAX_LENGTH = 254
+CLAIM_MAX_LENGTH = 32
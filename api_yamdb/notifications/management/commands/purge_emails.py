@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.services import purge_emails
+
+
+class Command(BaseCommand):
+    help = 'Delete sent and failed emails older than the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='retention period in days (EMAIL_RETENTION_DAYS by default)'
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] is not None and options['days'] < 0:
+            raise CommandError('Retention period must not be negative')
+        deleted = purge_emails(options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} emails'))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.services import EmailDispatcher, get_queue_depth
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='deliver all due emails and exit'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='emails claimed and sent per batch'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=None,
+            help='seconds to wait after a delivery, doubled up to '
+                 'EMAIL_IDLE_INTERVAL while the outbox is empty '
+                 '(EMAIL_FLUSH_INTERVAL by default)'
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = EmailDispatcher(
+            options['batch_size'], options['interval']
+        )
+        delivered = 0
+        try:
+            while True:
+                processed = dispatcher.flush()
+                delivered += processed
+                if processed and options['verbosity'] > 1:
+                    self.report(dispatcher)
+                if options['once']:
+                    break
+                time.sleep(dispatcher.backoff(processed))
+        except KeyboardInterrupt:
+            pass
+
+        self.report(dispatcher)
+        self.stdout.write(
+            self.style.SUCCESS(f'Processed {delivered} emails')
+        )
+
+    def report(self, dispatcher):
+        stats = dispatcher.stats.as_dict()
+        rate = stats['messages_per_second']
+        self.stdout.write(
+            f"sent={stats['sent']} failed={stats['failed']} "
+            f"rate={rate if rate is not None else '-'} msg/s "
+            f'queue={get_queue_depth()}'
+        )
@@ -0,0 +1,60 @@
+from django.db import models
+from django.utils import timezone
+
+from notifications.constants import (
+    CLAIM_MAX_LENGTH, EMAIL_MAX_LENGTH, SUBJECT_MAX_LENGTH)
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (PENDING, 'Ожидает отправки'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    STATUS_MAX_LENGTH = max(len(status[0]) for status in STATUSES)
+
+    subject = models.CharField(verbose_name='Тема',
+                               max_length=SUBJECT_MAX_LENGTH)
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(verbose_name='Отправитель',
+                                   max_length=EMAIL_MAX_LENGTH)
+    recipient = models.EmailField(verbose_name='Получатель',
+                                  max_length=EMAIL_MAX_LENGTH)
+    status = models.CharField(verbose_name='Статус',
+                              max_length=STATUS_MAX_LENGTH,
+                              choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток отправки', default=0)
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Следующая попытка', default=timezone.now)
+    claim = models.CharField(verbose_name='Метка обработчика',
+                             max_length=CLAIM_MAX_LENGTH,
+                             blank=True)
+    last_error = models.TextField(verbose_name='Последняя ошибка',
+                                  blank=True)
+    created = models.DateTimeField(verbose_name='Создано',
+                                   auto_now_add=True)
+    sent_at = models.DateTimeField(verbose_name='Отправлено',
+                                   null=True,
+                                   blank=True)
+
+    class Meta:
+        ordering = ('next_attempt_at',)
+        verbose_name = 'письмо'
+        verbose_name_plural = 'Очередь писем'
+        indexes = (
+            models.Index(fields=('status', 'next_attempt_at'),
+                         name='outgoing_email_due_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.recipient}: {self.subject}'
@@ -0,0 +1,372 @@
+import logging
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.models import OutgoingEmail
+
+
+logger = logging.getLogger(__name__)
+
+SYNC_MODE = 'sync'
+THREAD_MODE = 'thread'
+OUTBOX_MODE = 'outbox'
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_email(subject, body, recipients, from_email=None):
+    """Ставит письма в очередь и запускает доставку согласно режиму.
+
+    В режиме `sync` письма отправляются сразу, в режиме `thread` - фоновым
+    диспетчером процесса после фиксации транзакции, в режиме `outbox` -
+    командой send_emails.
+    """
+    emails = [
+        OutgoingEmail.objects.create(
+            subject=subject,
+            body=body,
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            recipient=recipient
+        )
+        for recipient in recipients
+    ]
+    email_ids = [email.pk for email in emails]
+    mode = get_setting('EMAIL_DELIVERY_MODE', THREAD_MODE)
+    if mode == SYNC_MODE:
+        deliver_emails(email_ids)
+    elif mode == THREAD_MODE:
+        transaction.on_commit(
+            lambda: get_dispatcher().notify(len(email_ids))
+        )
+    return emails
+
+
+def get_due_emails(now=None):
+    """Письма, которые пора отправить или повторить."""
+    return OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.PENDING, OutgoingEmail.SENDING),
+        next_attempt_at__lte=now or timezone.now()
+    )
+
+
+def claim_emails(limit, email_ids=None):
+    """Захватывает готовые к отправке письма для текущего обработчика.
+
+    Захват выполняется условным UPDATE, поэтому параллельные обработчики
+    не получат одно письмо дважды. Письма зависшего обработчика снова
+    становятся доступны по истечении аренды.
+    """
+    now = timezone.now()
+    due = get_due_emails(now)
+    if email_ids is not None:
+        due = due.filter(pk__in=email_ids)
+    candidate_ids = list(due.values_list('pk', flat=True)[:limit])
+    if not candidate_ids:
+        return []
+
+    claim = uuid.uuid4().hex
+    lease = timedelta(seconds=get_setting('EMAIL_CLAIM_LEASE', 300))
+    due.filter(pk__in=candidate_ids).update(
+        status=OutgoingEmail.SENDING,
+        claim=claim,
+        next_attempt_at=now + lease
+    )
+    # Отбор по id идёт по первичному ключу, а не сканированием по claim.
+    return list(
+        OutgoingEmail.objects.filter(pk__in=candidate_ids, claim=claim)
+    )
+
+
+def mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)
+    email.claim = ''
+    if email.attempts >= get_setting('EMAIL_MAX_ATTEMPTS', 5):
+        # Текст с кодом подтверждения больше не понадобится.
+        email.status = OutgoingEmail.FAILED
+        email.body = ''
+    else:
+        backoff = get_setting('EMAIL_RETRY_BACKOFF', 60)
+        email.status = OutgoingEmail.PENDING
+        email.next_attempt_at = timezone.now() + timedelta(
+            seconds=backoff * 2 ** (email.attempts - 1)
+        )
+    email.save(update_fields=(
+        'attempts', 'last_error', 'claim', 'status', 'next_attempt_at',
+        'body'
+    ))
+
+
+def send_claimed(emails, connection):
+    """Отправляет захваченные письма через одно соединение."""
+    sent_ids = []
+    for email in emails:
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, [email.recipient],
+            connection=connection
+        )
+        try:
+            message.send()
+        except Exception as error:
+            logger.exception('Не удалось отправить письмо %s', email.pk)
+            mark_failed(email, error)
+        else:
+            sent_ids.append(email.pk)
+    # Текст отправленного письма не хранится: в нём код подтверждения.
+    OutgoingEmail.objects.filter(pk__in=sent_ids).update(
+        status=OutgoingEmail.SENT,
+        sent_at=timezone.now(),
+        claim='',
+        body='',
+        attempts=F('attempts') + 1
+    )
+    return len(sent_ids)
+
+
+def deliver_pending(batch_size=None, email_ids=None, connection=None):
+    """Отправляет одну пачку писем, возвращает пару (обработано, отправлено).
+
+    Переданное соединение не закрывается, иначе для пачки открывается
+    собственное соединение.
+    """
+    batch_size = batch_size or get_setting('EMAIL_BATCH_SIZE', 100)
+    emails = claim_emails(batch_size, email_ids)
+    if not emails:
+        return 0, 0
+    if connection is not None:
+        return len(emails), send_claimed(emails, connection)
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as error:
+        logger.exception('Не удалось открыть соединение с почтовым сервером')
+        for email in emails:
+            mark_failed(email, error)
+        return len(emails), 0
+    try:
+        sent = send_claimed(emails, connection)
+    finally:
+        connection.close()
+    return len(emails), sent
+
+
+def deliver_emails(email_ids):
+    while deliver_pending(email_ids=email_ids)[0]:
+        pass
+
+
+def purge_emails(retention_days=None):
+    """Удаляет отправленные и неотправленные письма старше срока хранения.
+
+    Срок задаётся настройкой EMAIL_RETENTION_DAYS и отсчитывается от
+    последней попытки отправки, письма отбираются по индексу очереди.
+    Возвращает число удалённых писем.
+    """
+    if retention_days is None:
+        retention_days = get_setting('EMAIL_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=retention_days)
+    deleted, _ = OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.SENT, OutgoingEmail.FAILED),
+        next_attempt_at__lt=cutoff
+    ).delete()
+    return deleted
+
+
+def get_queue_depth():
+    return OutgoingEmail.objects.filter(
+        status__in=(OutgoingEmail.PENDING, OutgoingEmail.SENDING)
+    ).count()
+
+
+class DispatchStats:
+    """Счётчики отправки писем диспетчером."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+
+    def record(self, processed, sent, seconds):
+        with self._lock:
+            self.sent += sent
+            self.failed += processed - sent
+            self.busy_seconds += seconds
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'sent': self.sent,
+                'failed': self.failed,
+                'messages_per_second': (
+                    round(self.sent / self.busy_seconds, 2)
+                    if self.busy_seconds else None
+                ),
+            }
+
+
+class EmailDispatcher:
+    """Отправляет письма из очереди пачками через одно соединение.
+
+    Соединение с почтовым сервером открывается при первой отправке и
+    переиспользуется между пачками, пока очередь не опустеет. В режиме
+    `thread` диспетчер работает в фоновом потоке: отправка начинается,
+    когда накопилось batch_size писем или прошло flush_interval секунд.
+    Пока писем нет, очередь проверяется всё реже, до раза в idle_interval
+    секунд; первое письмо после простоя будит поток сразу.
+    """
+
+    def __init__(self, batch_size=None, flush_interval=None,
+                 idle_interval=None):
+        self.batch_size = (
+            batch_size or get_setting('EMAIL_BATCH_SIZE', 100)
+        )
+        self.flush_interval = (
+            flush_interval or get_setting('EMAIL_FLUSH_INTERVAL', 2)
+        )
+        self.idle_interval = max(
+            idle_interval or get_setting('EMAIL_IDLE_INTERVAL', 60),
+            self.flush_interval
+        )
+        self._timeout = self.flush_interval
+        self.stats = DispatchStats()
+        self._connection = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._notified = 0
+        self._thread = None
+
+    def flush(self):
+        """Отправляет все готовые письма, возвращает число обработанных."""
+        total = 0
+        try:
+            while True:
+                started = time.monotonic()
+                processed, sent = self._deliver_batch()
+                if not processed:
+                    break
+                self.stats.record(
+                    processed, sent, time.monotonic() - started
+                )
+                total += processed
+        finally:
+            self.close()
+        return total
+
+    def _deliver_batch(self):
+        if self._connection is None:
+            self._connection = get_connection()
+            try:
+                self._connection.open()
+            except Exception as error:
+                self._connection = None
+                logger.exception(
+                    'Не удалось открыть соединение с почтовым сервером'
+                )
+                emails = claim_emails(self.batch_size)
+                for email in emails:
+                    mark_failed(email, error)
+                return len(emails), 0
+        processed, sent = deliver_pending(
+            self.batch_size, connection=self._connection
+        )
+        if sent < processed:
+            # После ошибки соединение могло оборваться, следующая пачка
+            # откроет новое.
+            self.close()
+        return processed, sent
+
+    def close(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            finally:
+                self._connection = None
+
+    def notify(self, count=1):
+        """Сообщает диспетчеру о новых письмах в очереди."""
+        self.start()
+        with self._lock:
+            self._notified += count
+            if (self._notified >= self.batch_size
+                    or self._timeout > self.flush_interval):
+                self._wakeup.set()
+
+    def backoff(self, busy):
+        """Пауза до следующей проверки очереди.
+
+        Пока писем нет, пауза удваивается до idle_interval, после отправки
+        снова равна flush_interval.
+        """
+        with self._lock:
+            if busy:
+                self._timeout = self.flush_interval
+            else:
+                self._timeout = min(self._timeout * 2, self.idle_interval)
+            return self._timeout
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stopping.clear()
+                self._thread = threading.Thread(
+                    target=self.run, name='email-dispatcher', daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        """Останавливает фоновый поток, отправив накопленные письма."""
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run(self):
+        timeout = self.flush_interval
+        try:
+            while not self._stopping.is_set():
+                self._wakeup.wait(timeout)
+                timeout = self._drain()
+            self._drain()
+        finally:
+            connections.close_all()
+
+    def _drain(self):
+        """Отправляет готовые письма, возвращает паузу до новой проверки."""
+        with self._lock:
+            self._wakeup.clear()
+            notified, self._notified = self._notified, 0
+        processed = 0
+        try:
+            # Без новых писем очередь всё равно проверяется, реже с каждым
+            # пустым тиком: иначе письма с истёкшей задержкой повтора и
+            # письма, брошенные другим процессом, ждали бы регистрации.
+            if (notified or self._stopping.is_set()
+                    or get_due_emails().exists()):
+                processed = self.flush()
+        except Exception:
+            logger.exception('Ошибка доставки писем в фоновом потоке')
+        return self.backoff(notified or processed)
+
+
+def get_dispatcher():
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = EmailDispatcher()
+        return _dispatcher
@@ -1,5 +1,4 @@
 from django.contrib import admin
-from django.db.models import Avg
 
 from .models import (
     Category, Comment, Genre, Review, Title)
@@ -30,8 +29,7 @@ class TitleAdmin(admin.ModelAdmin):
 
     @admin.display(description='Рейтинг')
     def get_average_score(self, obj):
-        average_score = obj.reviews.aggregate(Avg('score'))['score__avg']
-        return round(average_score, 2) if average_score else None
+        return round(obj.rating, 2) if obj.rating else None
 
     @admin.display(description='Жанры')
     def display_genres(self, obj):
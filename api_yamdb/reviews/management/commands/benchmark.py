@@ -0,0 +1,190 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from reviews.models import Category, Comment, Genre, Review, Title, User
+
+
+CATEGORIES = 5
+GENRES = 10
+GENRES_PER_TITLE = 2
+# Индекс промежуточной таблицы создан миграцией через RunSQL.
+EXTRA_INDEXES = ('title_genre_genre_title_idx',)
+
+
+def get_api_indexes():
+    """Имена индексов, добавленных под запросы API."""
+    names = [
+        index.name for model in (Title, Review, Comment)
+        for index in model._meta.indexes
+    ]
+    return [*names, *EXTRA_INDEXES]
+
+
+def get_benchmark_queries(title_id, review_id, category_id, genre_ids):
+    """Запросы, которыми API читает каталог, отзывы и комментарии."""
+    return {
+        'title-list': Title.objects.order_by('-year')[:10],
+        'title-category': Title.objects.filter(
+            category_id=category_id).order_by('-year')[:10],
+        'title-genre': Title.objects.with_genres(
+            genre_ids[:1]).order_by('-year')[:10],
+        'title-genres-any': Title.objects.with_genres(
+            genre_ids).order_by('-year')[:10],
+        'title-genres-all': Title.objects.with_genres(
+            genre_ids, match_all=True).order_by('-year')[:10],
+        'title-reviews': Review.objects.filter(
+            title_id=title_id).order_by('-pub_date', '-id')[:10],
+        'review-comments': Comment.objects.filter(
+            review_id=review_id).order_by('-pub_date', '-id')[:10],
+    }
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def seed(titles, reviews_per_title, batch_size=1000):
+    """Создаёт синтетический каталог, возвращает параметры запросов."""
+    prefix = f'bench{next_id(User)}'
+    now = timezone.now()
+    first_user = next_id(User)
+    User.objects.bulk_create([
+        User(id=first_user + idx, username=f'{prefix}_{idx}',
+             email=f'{prefix}_{idx}@yamdb.fake')
+        for idx in range(reviews_per_title)
+    ], batch_size=batch_size)
+    first_category = next_id(Category)
+    Category.objects.bulk_create([
+        Category(id=first_category + idx, name=f'Категория {idx}',
+                 slug=f'{prefix}-category-{idx}')
+        for idx in range(CATEGORIES)
+    ])
+    first_genre = next_id(Genre)
+    Genre.objects.bulk_create([
+        Genre(id=first_genre + idx, name=f'Жанр {idx}',
+              slug=f'{prefix}-genre-{idx}')
+        for idx in range(GENRES)
+    ])
+
+    first_title = next_id(Title)
+    first_review = next_id(Review)
+    first_comment = next_id(Comment)
+    for start in range(0, titles, batch_size):
+        chunk = range(start, min(start + batch_size, titles))
+        Title.objects.bulk_create([
+            Title(id=first_title + idx, name=f'Произведение {idx}',
+                  year=1900 + idx % 120,
+                  category_id=first_category + idx % CATEGORIES)
+            for idx in chunk
+        ])
+        Title.genre.through.objects.bulk_create([
+            Title.genre.through(
+                title_id=first_title + idx,
+                genre_id=first_genre + (idx + shift) % GENRES)
+            for idx in chunk for shift in range(GENRES_PER_TITLE)
+        ])
+        reviews = [
+            Review(id=first_review + idx * reviews_per_title + author,
+                   title_id=first_title + idx,
+                   author_id=first_user + author,
+                   text='Отзыв', score=random.randint(1, 10),
+                   pub_date=now - timedelta(minutes=idx + author))
+            for idx in chunk for author in range(reviews_per_title)
+        ]
+        Review.objects.bulk_create(reviews)
+        Comment.objects.bulk_create([
+            Comment(id=first_comment + review.id - first_review,
+                    review_id=review.id, author_id=review.author_id,
+                    text='Комментарий', pub_date=review.pub_date)
+            for review in reviews
+        ])
+    return {
+        'title_id': first_title,
+        'review_id': first_review,
+        # API переводит слаги в id по кешу до построения запроса.
+        'category_id': first_category,
+        'genre_ids': (first_genre, first_genre + 1),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Seed a synthetic catalog and show plans and timings of API queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--titles',
+            type=int,
+            default=100000,
+            help='titles to create'
+        )
+        parser.add_argument(
+            '--reviews-per-title',
+            type=int,
+            default=5,
+            help='reviews (each with one comment) per title'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='runs of every query to average'
+        )
+        parser.add_argument(
+            '--compare',
+            action='store_true',
+            help='also run the queries with the API indexes dropped'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='keep the seeded data instead of rolling it back'
+        )
+
+    def handle(self, *args, **options):
+        if min(options['titles'], options['reviews_per_title'],
+               options['repeat']) < 1:
+            raise CommandError('Sizes must be positive')
+
+        with transaction.atomic():
+            started = time.monotonic()
+            params = seed(options['titles'], options['reviews_per_title'])
+            self.stdout.write(
+                f'Seeded {options["titles"]} titles in '
+                f'{time.monotonic() - started:.1f}s'
+            )
+            queries = get_benchmark_queries(**params)
+            for name, queryset in queries.items():
+                self.run_query(name, queryset, options['repeat'], 1)
+            if options['compare']:
+                self.stdout.write('Without API indexes:')
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        for index in get_api_indexes():
+                            cursor.execute(f'DROP INDEX {index}')
+                    for name, queryset in queries.items():
+                        self.run_query(
+                            name, queryset, options['repeat'], 2
+                        )
+                    transaction.set_rollback(True)
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def run_query(self, name, queryset, repeat, run):
+        # sqlite3 кеширует подготовленные запросы по тексту и не видит
+        # удалённых индексов, поэтому текст запроса у прогонов разный.
+        queryset = queryset.annotate(benchmark_run=RawSQL(str(run), ()))
+        started = time.monotonic()
+        for _ in range(repeat):
+            list(queryset.all())
+        elapsed = (time.monotonic() - started) / repeat * 1000
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{name}: {elapsed:.2f} ms'
+        ))
+        self.stdout.write(queryset.explain())
@@ -0,0 +1,141 @@
+import csv
+import gzip
+import json
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .import_csv import IMPORTERS
+
+
+FORMATS = ('csv', 'ndjson')
+
+
+class Command(BaseCommand):
+    help = 'Stream model rows to csv or ndjson ordered by primary key'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', type=str, help='model to export')
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='output file, "-" for stdout; .gz files are compressed'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='csv',
+            help='csv columns match import_csv, ndjson writes one object '
+                 'per line'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='compress the output file'
+        )
+        parser.add_argument(
+            '--append',
+            action='store_true',
+            help='append to the output file, e.g. to resume an export '
+                 'with --start-id'
+        )
+        parser.add_argument(
+            '--start-id',
+            type=int,
+            default=None,
+            help='first primary key to export'
+        )
+        parser.add_argument(
+            '--end-id',
+            type=int,
+            default=None,
+            help='last primary key to export'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='rows fetched from the database at once'
+        )
+
+    def handle(self, *args, **options):
+        model_name = options['model'].lower()
+        if model_name not in IMPORTERS:
+            raise CommandError(
+                (f'Model: {options["model"].capitalize()} does not exist'
+                 f'\nExisting models: {", ".join(IMPORTERS)}')
+            )
+        if options['chunk_size'] < 1:
+            raise CommandError('Chunk size must be positive')
+        importer = IMPORTERS[model_name]
+        to_stdout = options['output'] == '-'
+        compress = options['gzip'] or options['output'].endswith('.gz')
+        if to_stdout and (compress or options['append']):
+            raise CommandError('--gzip and --append need an output file')
+
+        queryset = importer.model.objects.order_by('pk')
+        if options['start_id'] is not None:
+            queryset = queryset.filter(pk__gte=options['start_id'])
+        if options['end_id'] is not None:
+            queryset = queryset.filter(pk__lte=options['end_id'])
+        # Колонка id есть не у всех файлов импорта, но нужна для
+        # продолжения выгрузки по диапазону.
+        columns = {'id': 'id', **importer.columns}
+        rows = queryset.values_list(*columns.values()).iterator(
+            chunk_size=options['chunk_size']
+        )
+
+        started = time.monotonic()
+        if to_stdout:
+            count, last_id = self.write(
+                self.stdout, rows, list(columns), options['format'], True
+            )
+        else:
+            path = options['output']
+            header = not (
+                options['append'] and os.path.exists(path)
+                and os.path.getsize(path)
+            )
+            mode = 'a' if options['append'] else 'w'
+            opener = gzip.open if compress else open
+            with opener(path, f'{mode}t', encoding='utf-8',
+                        newline='') as file:
+                count, last_id = self.write(
+                    file, rows, list(columns), options['format'], header
+                )
+
+        elapsed = time.monotonic() - started
+        rate = count / elapsed if elapsed else count
+        self.stderr.write(
+            f'Exported {count} rows in {elapsed:.2f}s ({rate:.0f} rows/s), '
+            f'last id: {last_id if last_id is not None else "-"}'
+        )
+
+    def write(self, file, rows, columns, output_format, header):
+        count = 0
+        last_id = None
+        if output_format == 'csv':
+            writer = csv.writer(file)
+            if header:
+                writer.writerow(columns)
+        encoder = DjangoJSONEncoder()
+        for row in rows:
+            if output_format == 'csv':
+                writer.writerow([
+                    encoder.default(value)
+                    if hasattr(value, 'isoformat') else value
+                    for value in row
+                ])
+            else:
+                file.write(
+                    json.dumps(
+                        dict(zip(columns, row)),
+                        cls=DjangoJSONEncoder,
+                        ensure_ascii=False
+                    ) + '\n'
+                )
+            count += 1
+            last_id = row[0]
+        return count, last_id
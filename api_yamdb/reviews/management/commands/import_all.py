@@ -0,0 +1,167 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections, transaction
+
+from .import_csv import IMPORTERS
+from .utils import invalidate_caches, load_csv
+
+
+def get_import_levels(importers):
+    """Группирует импортёры по уровням зависимостей.
+
+    Импортёр попадает на уровень после всех импортёров моделей, на которые
+    ссылаются его внешние ключи. Импортёры одного уровня независимы.
+    """
+    by_model = {importer.model: importer for importer in importers}
+    dependencies = {
+        importer: {
+            by_model[model] for model in importer.foreign_keys.values()
+            if model in by_model and by_model[model] is not importer
+        }
+        for importer in importers
+    }
+    levels = []
+    done = set()
+    while len(done) < len(importers):
+        level = [
+            importer for importer in importers
+            if importer not in done and dependencies[importer] <= done
+        ]
+        if not level:
+            raise CommandError('Import dependencies are cyclic')
+        levels.append(level)
+        done.update(level)
+    return levels
+
+
+class Command(BaseCommand):
+    help = 'Import every known csv file of a directory in dependency order'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', type=str, help='path to csv files')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='rows inserted per query'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='files of one dependency level loaded concurrently, '
+                 'each in its own transaction (ignored for SQLite)'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('Batch size and workers must be positive')
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'Directory {directory} does not exist')
+
+        importers = []
+        for importer_class in IMPORTERS.values():
+            path = os.path.join(directory, importer_class.file_name)
+            if os.path.exists(path):
+                importers.append(importer_class())
+            else:
+                self.stdout.write(
+                    f'{importer_class.file_name} not found, skipped'
+                )
+        self.paths = {
+            importer: os.path.join(directory, importer.file_name)
+            for importer in importers
+        }
+        self.batch_size = options['batch_size']
+        levels = get_import_levels(importers)
+
+        # SQLite допускает одну пишущую транзакцию, там всё грузится
+        # последовательно в одной транзакции.
+        parallel = connection.vendor != 'sqlite' and options['workers'] > 1
+        started = time.monotonic()
+        if parallel:
+            # Каждый файл грузится в своей транзакции: при ошибке уже
+            # загруженные файлы остаются в базе.
+            committed = []
+            try:
+                rows = self.load_parallel(
+                    levels, options['workers'], committed
+                )
+            except Exception:
+                self.finish(committed)
+                self.stderr.write(
+                    'Committed before failure: '
+                    + (', '.join(importer.file_name for importer in committed)
+                       or 'nothing')
+                )
+                raise
+        else:
+            with transaction.atomic():
+                rows = self.load_sequential(levels)
+        self.finish(importers)
+
+        elapsed = time.monotonic() - started
+        rate = rows / elapsed if elapsed else rows
+        self.stdout.write(self.style.SUCCESS(
+            f'Data imported successfully: {rows} rows from '
+            f'{len(importers)} files in {elapsed:.2f}s ({rate:.0f} rows/s)'
+        ))
+
+    def finish(self, importers):
+        with transaction.atomic():
+            # Производные данные пересчитываются один раз после загрузки.
+            for importer in importers:
+                importer.after_import()
+        invalidate_caches(*(importer.model for importer in importers))
+
+    def load(self, importer):
+        started = time.monotonic()
+        rows = load_csv(
+            importer, self.paths[importer], self.batch_size
+        )['rows']
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{importer.file_name}: {rows} rows in {elapsed:.2f}s'
+        )
+        return rows
+
+    def load_in_thread(self, importer):
+        try:
+            with transaction.atomic():
+                return self.load(importer)
+        finally:
+            connections.close_all()
+
+    def load_sequential(self, levels):
+        return sum(
+            self.load(importer) for level in levels for importer in level
+        )
+
+    def load_parallel(self, levels, workers, committed):
+        """Грузит файлы уровня параллельно, уровни - по очереди.
+
+        Загруженные файлы добавляются в committed. При ошибке дожидается
+        остальных файлов уровня и выбрасывает первую ошибку.
+        """
+        rows = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for level in levels:
+                futures = [
+                    (importer, executor.submit(self.load_in_thread, importer))
+                    for importer in level
+                ]
+                errors = []
+                for importer, future in futures:
+                    try:
+                        rows += future.result()
+                    except Exception as error:
+                        errors.append(error)
+                    else:
+                        committed.append(importer)
+                if errors:
+                    raise errors[0]
+        return rows
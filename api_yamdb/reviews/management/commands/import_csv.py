@@ -1,78 +1,93 @@
-import csv
+import time
 
 from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
-from reviews.models import (
-    Title, Category, Genre, Review, Comment, User
-)
 from .utils import (
-    import_comment_model,
-    import_category_model,
-    import_genre_model,
-    import_genre_title_model,
-    import_review_model,
-    import_title_model,
-    import_user_model,
+    CSVImporter,
+    CategoryImporter,
+    CommentImporter,
+    GenreImporter,
+    GenreTitleImporter,
+    ReviewImporter,
+    TitleImporter,
+    UserImporter,
+    invalidate_caches,
+    load_csv,
 )
 
 
-MODELS = {
-    'title': Title,
-    'category': Category,
-    'genre': Genre,
-    'review': Review,
-    'comment': Comment,
-    'user': User,
-    'genre_title': (Genre, Title),
-}
-
-
-MODELS_FUNCTIONS = {
-    'title': import_title_model,
-    'category': import_category_model,
-    'genre': import_genre_model,
-    'genre_title': import_genre_title_model,
-    'review': import_review_model,
-    'comment': import_comment_model,
-    'user': import_user_model,
+IMPORTERS = {
+    'title': TitleImporter,
+    'category': CategoryImporter,
+    'genre': GenreImporter,
+    'review': ReviewImporter,
+    'comment': CommentImporter,
+    'user': UserImporter,
+    'genre_title': GenreTitleImporter,
 }
 
 
 class Command(BaseCommand):
+    help = 'Import rows of a csv file into a model in batches'
 
     def add_arguments(self, parser):
         parser.add_argument('csv_file_path', type=str, help='path to csv file')
         parser.add_argument('model', type=str, help='model to add')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='rows inserted per query'
+        )
+        parser.add_argument(
+            '--mode',
+            choices=CSVImporter.MODES,
+            default=CSVImporter.IGNORE,
+            help='ignore keeps existing rows, upsert updates changed ones'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='report inserted/updated/unchanged rows and roll back'
+        )
 
     def handle(self, *args, **options):
-        csv_file_path = options['csv_file_path']
-        model = MODELS.get(options['model'].lower())
-
-        if not model:
+        model_name = options['model'].lower()
+        if model_name not in IMPORTERS:
             raise CommandError(
                 (f'Model: {options["model"].capitalize()} does not exist'
-                 f'\nExisting models: {", ".join(MODELS.keys())}')
+                 f'\nExisting models: {", ".join(IMPORTERS)}')
             )
-
-        func = MODELS_FUNCTIONS[options['model']]
-        model_instances = []
-
-        with open(csv_file_path, 'r', encoding='utf-8') as file:
-            csv_file = csv.DictReader(file)
-
-            if options['model'].lower() == 'genre_title':
-                for line in csv_file:
-                    func(line)
-
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be positive')
+
+        importer = IMPORTERS[model_name]()
+        started = time.monotonic()
+        with transaction.atomic():
+            counts = load_csv(
+                importer, options['csv_file_path'], options['batch_size'],
+                self.report_progress if options['verbosity'] > 1 else None,
+                options['mode'], options['dry_run']
+            )
+            if options['dry_run']:
+                transaction.set_rollback(True)
             else:
-
-                for line in csv_file:
-                    model_instance = func(line)
-
-                    model_instances.append(model_instance)
-
-                model.objects.bulk_create(
-                    model_instances, ignore_conflicts=True
-                )
-
-        self.stdout.write(self.style.SUCCESS('Data imported successfully'))
+                importer.after_import()
+        if not options['dry_run']:
+            invalidate_caches(importer.model)
+
+        rows = counts.pop('rows', 0)
+        elapsed = time.monotonic() - started
+        rate = rows / elapsed if elapsed else rows
+        outcome = ', '.join(
+            f'{name} {count}' for name, count in sorted(counts.items())
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'{"Dry run" if options["dry_run"] else "Data imported"} '
+            f'successfully: {rows} rows in {elapsed:.2f}s '
+            f'({rate:.0f} rows/s)' + (f'; {outcome}' if outcome else '')
+        ))
+
+    def report_progress(self, rows, rate):
+        self.stdout.write(f'{rows} rows imported ({rate:.0f} rows/s)')
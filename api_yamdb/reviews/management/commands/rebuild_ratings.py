@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.models import Title
+
+from .utils import invalidate_caches
+
+
+class Command(BaseCommand):
+    help = 'Rebuild or verify stored title ratings against reviews'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='only report titles with inconsistent ratings'
+        )
+
+    def handle(self, *args, **options):
+        mismatched = Title.objects.with_stale_rating().values_list(
+            'id', flat=True)
+
+        if options['check']:
+            title_ids = list(mismatched)
+            if title_ids:
+                raise CommandError(
+                    f'Inconsistent ratings for titles: '
+                    f'{", ".join(map(str, title_ids))}'
+                )
+            self.stdout.write(self.style.SUCCESS('All ratings are consistent'))
+            return
+
+        updated = Title.objects.rebuild_ratings()
+        if updated:
+            # QuerySet.update не вызывает сигналы сброса кешей ответов.
+            invalidate_caches(Title)
+        self.stdout.write(
+            self.style.SUCCESS(f'Ratings rebuilt for {updated} titles')
+        )
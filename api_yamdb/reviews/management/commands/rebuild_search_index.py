@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from reviews.search import install_search_index
+
+
+class Command(BaseCommand):
+    help = 'Create the title search index if missing and reindex all titles'
+
+    def handle(self, *args, **options):
+        if not install_search_index():
+            raise CommandError(
+                f'Full-text search is not supported for {connection.vendor}'
+            )
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt'))
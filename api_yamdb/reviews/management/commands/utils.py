@@ -1,74 +1,384 @@
+import csv
+import time
+from collections import Counter
+from itertools import islice
+
+from django.core.management.base import CommandError
+from django.db.models import F
+from django.utils import timezone
+
+from api.cache import CATALOG_NAMESPACE, bump_generation
 from reviews.models import (
     Title, Category, Genre, Review, Comment, User
 )
+from users.models import UsernameTrigram
+
+
+class CSVImporter:
+    """Пакетный импорт строк csv файла в модель.
+
+    `columns` сопоставляет колонки файла с атрибутами модели, внешние ключи
+    присваиваются напрямую через `*_id`. Существование связанных объектов
+    проверяется одним запросом на пачку для каждого внешнего ключа, а при
+    `preload_keys` - по множеству id, загруженному один раз.
+
+    Режим `ignore` пропускает строки, уже существующие в базе, режим
+    `upsert` обновляет у них изменившиеся поля. Строки сопоставляются по
+    `unique_fields`.
+    """
+
+    IGNORE = 'ignore'
+    UPSERT = 'upsert'
+    MODES = (IGNORE, UPSERT)
+
+    model = None
+    file_name = None
+    columns = {}
+    foreign_keys = {}
+    unique_fields = ('id',)
+    preload_keys = False
+
+    def __init__(self):
+        self._preloaded = {}
+        self.loaded_fields = ()
+
+    def build(self, row):
+        values = {}
+        for column, attname in self.columns.items():
+            if column not in row:
+                continue
+            value = row[column]
+            if value == '' and self.model._meta.get_field(attname).null:
+                value = None
+            values[attname] = value
+        return self.model(**values)
+
+    def check_foreign_keys(self, instances, first_row):
+        for attname, related_model in self.foreign_keys.items():
+            referenced = {
+                str(getattr(instance, attname)) for instance in instances
+                if getattr(instance, attname) is not None
+            }
+            existing = self.get_existing_ids(
+                attname, related_model, referenced
+            )
+            for row, instance in enumerate(instances, first_row):
+                value = getattr(instance, attname)
+                if value is not None and str(value) not in existing:
+                    raise CommandError(
+                        f'Row {row}: {related_model.__name__} '
+                        f'with id {value} does not exist'
+                    )
+
+    def get_existing_ids(self, attname, related_model, referenced):
+        if not self.preload_keys:
+            return set(map(str, related_model.objects.filter(
+                pk__in=referenced).values_list('pk', flat=True)))
+        if attname not in self._preloaded:
+            self._preloaded[attname] = set(map(
+                str, related_model.objects.values_list('pk', flat=True)
+            ))
+        return self._preloaded[attname]
+
+    def normalize(self, attname, value):
+        if value is None:
+            return None
+        return self.model._meta.get_field(attname).to_python(value)
+
+    def get_key(self, instance, attnames):
+        return tuple(
+            self.normalize(attname, getattr(instance, attname))
+            for attname in attnames
+        )
+
+    def diff(self, instances):
+        """Делит пачку на новые, изменённые и неизменённые строки.
+
+        Существующие строки загружаются одним запросом, изменённые
+        возвращаются вместе с прежними значениями полей из файла.
+        """
+        missing = set(self.unique_fields) - set(self.loaded_fields)
+        if missing:
+            raise CommandError(
+                f'Columns for {", ".join(sorted(missing))} are required '
+                f'to match existing rows'
+            )
+        compared = [
+            attname for attname in self.loaded_fields
+            if attname not in self.unique_fields
+        ]
+        lookup = {
+            f'{attname}__in': {
+                self.normalize(attname, getattr(instance, attname))
+                for instance in instances
+            }
+            for attname in self.unique_fields
+        }
+        size = len(self.unique_fields)
+        existing = {
+            row[:size]: row[size:]
+            for row in self.model.objects.filter(**lookup).values_list(
+                *self.unique_fields, *compared)
+        }
+        new, changed, unchanged = [], [], []
+        for instance in instances:
+            key = self.get_key(instance, self.unique_fields)
+            if key not in existing:
+                new.append(instance)
+                continue
+            previous = dict(zip(compared, existing[key]))
+            if self.get_key(instance, compared) == tuple(previous.values()):
+                unchanged.append(instance)
+            else:
+                changed.append((instance, previous))
+        return new, changed, unchanged
+
+    def prepare_update(self, instance, previous):
+        """Заполняет поля, которые меняются вместе с обновлением строки.
+
+        Возвращает имена этих полей для bulk_update.
+        """
+        fields = [
+            field.attname for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+            and field.attname not in self.loaded_fields
+        ]
+        for attname in fields:
+            setattr(instance, attname, timezone.now())
+        return fields
+
+    def save(self, instances, mode=IGNORE, dry_run=False):
+        """Сохраняет пачку, возвращает счётчики строк по исходу."""
+        if mode == self.IGNORE and not dry_run:
+            self.model.objects.bulk_create(instances, ignore_conflicts=True)
+            return Counter()
+
+        new, changed, unchanged = self.diff(instances)
+        self.model.objects.bulk_create(new, ignore_conflicts=True)
+        if mode == self.IGNORE:
+            return Counter(
+                inserted=len(new), skipped=len(changed) + len(unchanged)
+            )
+
+        if changed:
+            fields = [
+                attname for attname in self.loaded_fields
+                if attname not in self.unique_fields
+            ]
+            for instance, previous in changed:
+                for attname in self.prepare_update(instance, previous):
+                    if attname not in fields:
+                        fields.append(attname)
+            self.model.objects.bulk_update(
+                [instance for instance, _ in changed], fields
+            )
+        return Counter(
+            inserted=len(new), updated=len(changed), unchanged=len(unchanged)
+        )
+
+    def after_import(self):
+        """Обновляет данные, которые bulk_create не поддерживает сам."""
+
+    def read_header(self, header):
+        """Запоминает поля модели, значения которых есть в файле."""
+        self.loaded_fields = [
+            attname for column, attname in self.columns.items()
+            if column in header
+        ]
+
+
+class NameSlugImporter(CSVImporter):
+    columns = {'id': 'id', 'name': 'name', 'slug': 'slug'}
+    # Поле произведения, по которому ищутся произведения обновлённых строк.
+    title_field = None
+
+    def __init__(self):
+        super().__init__()
+        self.updated_ids = []
+
+    def build(self, row):
+        # Как и NameSlugMixin.save, приводит слаг к нижнему регистру.
+        instance = super().build(row)
+        instance.slug = instance.slug.lower()
+        return instance
+
+    def prepare_update(self, instance, previous):
+        self.updated_ids.append(instance.pk)
+        return super().prepare_update(instance, previous)
+
+    def save(self, instances, mode=CSVImporter.IGNORE, dry_run=False):
+        self.updated_ids = []
+        counts = super().save(instances, mode, dry_run)
+        # bulk_update не вызывает touch_category_titles и
+        # touch_genre_titles, версии произведений меняются здесь.
+        if self.updated_ids:
+            Title.objects.filter(
+                **{f'{self.title_field}__in': self.updated_ids}
+            ).touch()
+        return counts
+
+
+class CategoryImporter(NameSlugImporter):
+    model = Category
+    file_name = 'category.csv'
+    title_field = 'category'
+
+
+class GenreImporter(NameSlugImporter):
+    model = Genre
+    file_name = 'genre.csv'
+    title_field = 'genre'
+
+
+class UserImporter(CSVImporter):
+    model = User
+    file_name = 'users.csv'
+    columns = {
+        'id': 'id', 'username': 'username', 'email': 'email', 'role': 'role',
+        'bio': 'bio', 'first_name': 'first_name', 'last_name': 'last_name',
+    }
+
+    def prepare_update(self, instance, previous):
+        # Как и User.save, смена роли отзывает выданные токены.
+        privileges_changed = any(
+            self.normalize(name, getattr(instance, name)) != previous[name]
+            for name in User.PRIVILEGE_FIELDS if name in previous
+        )
+        instance.auth_version = F('auth_version') + int(privileges_changed)
+        return [*super().prepare_update(instance, previous), 'auth_version']
+
+    def save(self, instances, mode=CSVImporter.IGNORE, dry_run=False):
+        counts = super().save(instances, mode, dry_run)
+        # bulk_create и bulk_update не вызывают сигналы, n-граммы username
+        # строятся по сохранённым строкам пачки.
+        UsernameTrigram.objects.index_users(User.objects.filter(
+            username__in=[instance.username for instance in instances]
+        ).only('username'))
+        return counts
+
+
+class TitleImporter(CSVImporter):
+    model = Title
+    file_name = 'titles.csv'
+    columns = {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'description': 'description', 'category': 'category_id',
+    }
+    foreign_keys = {'category_id': Category}
+
+    def prepare_update(self, instance, previous):
+        instance.version = F('version') + 1
+        return [*super().prepare_update(instance, previous), 'version']
 
 
-def import_title_model(data: dict[str:str]) -> Title:
-    category = Category.objects.get(pk=data['category'])
-    instance = Title(
-        id=data.get('id'),
-        name=data.get('name'),
-        year=data.get('year'),
-        category=category
-    )
+class TitleRelatedImporter(CSVImporter):
+    """Импорт строк, ссылающихся на произведение через title_id.
 
-    return instance
+    Запоминает произведения загруженных строк, и after_import обновляет
+    производные данные только у них.
+    """
 
+    chunk_size = 500
 
-def import_genre_model(data: dict) -> Genre:
-    return Genre(**data)
+    def __init__(self):
+        super().__init__()
+        self.title_ids = set()
 
+    def save(self, instances, mode=CSVImporter.IGNORE, dry_run=False):
+        counts = super().save(instances, mode, dry_run)
+        self.title_ids.update(
+            self.normalize('title_id', instance.title_id)
+            for instance in instances
+        )
+        return counts
 
-def import_category_model(data: dict) -> Category:
-    return Category(**data)
+    def get_titles(self):
+        """Произведения загруженных строк пачками по chunk_size."""
+        title_ids = sorted(self.title_ids)
+        for start in range(0, len(title_ids), self.chunk_size):
+            yield Title.objects.filter(
+                pk__in=title_ids[start:start + self.chunk_size]
+            )
 
 
-def import_genre_title_model(data: dict) -> None:
-    title_id = data.get('title_id')
-    genre_id = data.get('genre_id')
+class ReviewImporter(TitleRelatedImporter):
+    model = Review
+    file_name = 'review.csv'
+    columns = {
+        'id': 'id', 'title_id': 'title_id', 'text': 'text',
+        'author': 'author_id', 'score': 'score', 'pub_date': 'pub_date',
+    }
+    foreign_keys = {'title_id': Title, 'author_id': User}
 
-    title = Title.objects.get(pk=title_id)
-    genre = Genre.objects.get(pk=genre_id)
+    def after_import(self):
+        # bulk_create не вызывает Review.save, рейтинги произведений
+        # пересчитываются по отзывам; rebuild_ratings сам меняет версии
+        # исправленных произведений для сброса ETag.
+        for titles in self.get_titles():
+            titles.rebuild_ratings()
 
-    title.genre.add(genre)
 
+class CommentImporter(CSVImporter):
+    model = Comment
+    file_name = 'comments.csv'
+    columns = {
+        'id': 'id', 'review_id': 'review_id', 'text': 'text',
+        'author': 'author_id', 'pub_date': 'pub_date',
+    }
+    foreign_keys = {'review_id': Review, 'author_id': User}
 
-def import_review_model(data: dict) -> Review:
-    title_id = data.get('title_id')
-    author_id = data.get('author')
-    title = Title.objects.get(pk=title_id)
-    author = User.objects.get(pk=author_id)
 
-    instance = Review(
-        id=data.get('id'),
-        title=title,
-        text=data.get('text'),
-        author=author,
-        score=data.get('score'),
-        pub_data=data.get('pub_date'),
-    )
+class GenreTitleImporter(TitleRelatedImporter):
+    """Связи произведений с жанрами через промежуточную модель.
 
-    return instance
+    id строк файла не сохраняются: повторяющиеся пары title_id и genre_id
+    пропускаются уникальным индексом промежуточной таблицы.
+    """
 
+    model = Title.genre.through
+    file_name = 'genre_title.csv'
+    columns = {'title_id': 'title_id', 'genre_id': 'genre_id'}
+    foreign_keys = {'title_id': Title, 'genre_id': Genre}
+    unique_fields = ('title_id', 'genre_id')
+    preload_keys = True
 
-def import_comment_model(data: dict) -> Comment:
-    review_id = data.get('review_id')
-    author_id = data.get('author')
-    review = Review.objects.get(pk=review_id)
-    author = User.objects.get(pk=author_id)
+    def after_import(self):
+        for titles in self.get_titles():
+            titles.touch()
 
-    instance = Comment(
-        id=data.get('id'),
-        review=review,
-        text=data.get('text'),
-        author=author,
-        pub_date=data.get('pub_date'),
-    )
 
-    return instance
+def load_csv(importer, path, batch_size, report=None,
+             mode=CSVImporter.IGNORE, dry_run=False):
+    """Импортирует файл пачками, возвращает счётчики строк.
 
+    Счётчик `rows` - число прочитанных строк, в режиме `upsert` и при
+    пробном запуске добавляются счётчики строк по исходу. report, если
+    передан, вызывается после каждой пачки с числом импортированных строк
+    и скоростью импорта.
+    """
+    started = time.monotonic()
+    counts = Counter()
+    with open(path, 'r', encoding='utf-8') as file:
+        csv_file = csv.DictReader(file)
+        importer.read_header(csv_file.fieldnames or ())
+        while True:
+            instances = [
+                importer.build(line)
+                for line in islice(csv_file, batch_size)
+            ]
+            if not instances:
+                break
+            importer.check_foreign_keys(instances, counts['rows'] + 1)
+            counts += importer.save(instances, mode, dry_run)
+            counts['rows'] += len(instances)
+            if report is not None:
+                rows = counts['rows']
+                report(rows, rows / (time.monotonic() - started))
+    return counts
 
-def import_user_model(data: dict) -> User:
-    instance = User(**data)
 
-    return instance
+def invalidate_caches(*models):
+    """Сбрасывает кеши ответов и COUNT после импорта в обход сигналов."""
+    for model in models:
+        bump_generation(f'table:{model._meta.db_table}')
+    bump_generation(CATALOG_NAMESPACE)
@@ -0,0 +1,79 @@
+from django.db import OperationalError, migrations, transaction
+
+
+# Копия reviews.search на момент миграции: исторические миграции не должны
+# зависеть от кода приложения.
+FTS_TABLE = 'reviews_title_fts'
+FTS_INSERT = (
+    f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+    f'VALUES (new.id, new.name, new.description);'
+)
+FTS_DELETE = (
+    f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) '
+    f"VALUES ('delete', old.id, old.name, old.description);"
+)
+PG_INDEX = 'title_search_idx'
+PG_VECTOR = (
+    "setweight(to_tsvector('simple', name), 'A') || "
+    "setweight(to_tsvector('simple', description), 'B')"
+)
+
+INSTALL = {
+    'sqlite': (
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        f"name, description, content='reviews_title', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert '
+        f'AFTER INSERT ON reviews_title BEGIN {FTS_INSERT} END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete '
+        f'AFTER DELETE ON reviews_title BEGIN {FTS_DELETE} END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+        f'AFTER UPDATE OF name, description ON reviews_title '
+        f'BEGIN {FTS_DELETE} {FTS_INSERT} END',
+        f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+    ),
+    'postgresql': (
+        f'CREATE INDEX IF NOT EXISTS {PG_INDEX} ON reviews_title '
+        f'USING gin (({PG_VECTOR}))',
+    ),
+}
+UNINSTALL = {
+    'sqlite': (
+        f'DROP TRIGGER IF EXISTS {FTS_TABLE}_insert',
+        f'DROP TRIGGER IF EXISTS {FTS_TABLE}_delete',
+        f'DROP TRIGGER IF EXISTS {FTS_TABLE}_update',
+        f'DROP TABLE IF EXISTS {FTS_TABLE}',
+    ),
+    'postgresql': (
+        f'DROP INDEX IF EXISTS {PG_INDEX}',
+    ),
+}
+
+
+def install_search(apps, schema_editor):
+    statements = INSTALL.get(schema_editor.connection.vendor, ())
+    try:
+        # SQLite может быть собран без FTS5, тогда поиск идёт по подстроке.
+        with transaction.atomic(using=schema_editor.connection.alias):
+            with schema_editor.connection.cursor() as cursor:
+                for statement in statements:
+                    cursor.execute(statement)
+    except OperationalError:
+        pass
+
+
+def uninstall_search(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        for statement in UNINSTALL.get(schema_editor.connection.vendor, ()):
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_api_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search, uninstall_search),
+    ]
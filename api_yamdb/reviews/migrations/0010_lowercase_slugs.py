@@ -0,0 +1,38 @@
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models.functions import Lower
+
+
+def find_case_duplicates(model):
+    """Слаги, совпадающие без учёта регистра, сгруппированные по нему."""
+    groups = defaultdict(list)
+    for slug in model.objects.order_by('slug').values_list('slug', flat=True):
+        groups[slug.lower()].append(slug)
+    return [slugs for slugs in groups.values() if len(slugs) > 1]
+
+
+def lowercase_slugs(apps, schema_editor):
+    for model_name in ('Category', 'Genre'):
+        model = apps.get_model('reviews', model_name)
+        # Иначе приведение к нижнему регистру упрётся в уникальность слага
+        # и миграция прервётся с IntegrityError без указания строк.
+        duplicates = find_case_duplicates(model)
+        if duplicates:
+            raise RuntimeError(
+                f'{model_name} slugs differ only by case, rename or merge '
+                f'them before migrating: '
+                f'{"; ".join(", ".join(slugs) for slugs in duplicates)}'
+            )
+        model.objects.update(slug=Lower('slug'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_title_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_slugs, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (
+    Count, Exists, F, OuterRef, Q, Subquery, Sum)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from reviews.constants import (
     MAX_CHARS_LENGTH, MAX_TEXT_LENGTH, MAX_VALUE_VALIDATOR,
@@ -10,14 +14,30 @@ from reviews.validators import validate_year
 User = get_user_model()
 
 
+class AuthorTextDateQuerySet(models.QuerySet):
+
+    def with_author_username(self):
+        """Присоединяет автора, загружая из его данных только username."""
+        own_fields = [field.name for field in self.model._meta.concrete_fields]
+        return self.select_related('author').only(
+            *own_fields, 'author__username'
+        )
+
+
 class AuthorTextDateMixin(models.Model):
     author = models.ForeignKey(
         User,
         verbose_name='Автор',
         on_delete=models.CASCADE)
     text = models.TextField(verbose_name='Текст')
+    # default вместо auto_now_add: импорт сохраняет даты из файла, не
+    # меняя атрибуты общего для всех потоков поля.
     pub_date = models.DateTimeField(
-        'Дата добавления', auto_now_add=True, db_index=True)
+        'Дата добавления', default=timezone.now, editable=False,
+        db_index=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+
+    objects = AuthorTextDateQuerySet.as_manager()
 
     class Meta:
         abstract = True
@@ -46,6 +66,14 @@ class NameSlugMixin(models.Model):
     def __str__(self):
         return self.name
 
+    def clean(self):
+        # Слаги хранятся в нижнем регистре, фильтры сравнивают их точно.
+        self.slug = self.slug.lower()
+
+    def save(self, *args, **kwargs):
+        self.slug = self.slug.lower()
+        super().save(*args, **kwargs)
+
 
 class Category(NameSlugMixin):
 
@@ -61,6 +89,78 @@ class Genre(NameSlugMixin):
         verbose_name_plural = 'Жанры'
 
 
+class TitleQuerySet(models.QuerySet):
+
+    def shift_rating(self, title_id, score_delta, count_delta):
+        """Инкрементально изменяет сохранённый рейтинг произведения."""
+        return self.filter(pk=title_id).update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+            version=F('version') + 1,
+        )
+
+    def with_genres(self, genre_ids, match_all=False):
+        """Произведения с любым или со всеми жанрами из genre_ids.
+
+        Жанры проверяются через EXISTS по промежуточной таблице, поэтому
+        строки произведений не размножаются соединением и DISTINCT не нужен,
+        а первая страница читается по индексу сортировки без полной выборки.
+        """
+        links = Title.genre.through.objects.filter(title=OuterRef('pk'))
+        if not match_all:
+            return self.filter(Exists(links.filter(genre_id__in=genre_ids)))
+        queryset = self
+        for genre_id in genre_ids:
+            queryset = queryset.filter(
+                Exists(links.filter(genre_id=genre_id))
+            )
+        return queryset
+
+    def touch(self):
+        """Увеличивает версию произведений после изменения их данных."""
+        return self.update(version=F('version') + 1)
+
+    @staticmethod
+    def _actual_rating_expressions():
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')).order_by().values('title')
+        return {
+            'rating_sum': Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            'rating_count': Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            ),
+        }
+
+    def with_actual_rating(self):
+        """Аннотирует сумму и количество оценок, посчитанные по отзывам."""
+        return self.annotate(**{
+            f'actual_{name}': expression for name, expression
+            in self._actual_rating_expressions().items()
+        })
+
+    def with_stale_rating(self):
+        """Произведения, сохранённый рейтинг которых расходится с отзывами."""
+        return self.with_actual_rating().filter(
+            ~Q(rating_sum=F('actual_rating_sum'))
+            | ~Q(rating_count=F('actual_rating_count'))
+        )
+
+    def rebuild_ratings(self):
+        """Пересчитывает рейтинг произведений, где он разошёлся с отзывами.
+
+        Версия исправленных произведений увеличивается, чтобы сбросить ETag.
+        """
+        return self.filter(
+            pk__in=self.with_stale_rating().values('pk')
+        ).update(
+            version=F('version') + 1, **self._actual_rating_expressions()
+        )
+
+
 class Title(models.Model):
     name = models.CharField(
         verbose_name='Название',
@@ -86,15 +186,51 @@ class Title(models.Model):
         null=True,
         related_name='titles'
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0,
+        editable=False,
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=1,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('-year', )
         verbose_name = 'произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['-year'], name='title_year_idx'),
+            models.Index(
+                fields=['category', '-year'], name='title_category_year_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        if not adding:
+            self.version = F('version') + 1
+        super().save(*args, **kwargs)
+        if not adding:
+            self.refresh_from_db(fields=('version',))
+
+    @property
+    def rating(self):
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
 
 class Review(AuthorTextDateMixin):
     score = models.PositiveSmallIntegerField(
@@ -108,11 +244,27 @@ class Review(AuthorTextDateMixin):
         default_related_name = 'reviews'
         verbose_name = 'отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=['author', 'title'],
                 name='unique_author_title_review')]
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if not self._state.adding:
+                previous = Review.objects.select_for_update().filter(
+                    pk=self.pk).values('title_id', 'score').first()
+                if previous:
+                    Title.objects.shift_rating(
+                        previous['title_id'], -previous['score'], -1)
+            super().save(*args, **kwargs)
+            Title.objects.shift_rating(self.title_id, int(self.score), 1)
+
 
 class Comment(AuthorTextDateMixin):
     review = models.ForeignKey(
@@ -123,3 +275,8 @@ class Comment(AuthorTextDateMixin):
         default_related_name = 'comments'
         verbose_name = 'комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'),
+        ]
@@ -0,0 +1,217 @@
+import re
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+from .models import Title
+
+
+TITLE_TABLE = Title._meta.db_table
+FTS_TABLE = f'{TITLE_TABLE}_fts'
+FTS_TRIGGERS = tuple(
+    f'{FTS_TABLE}_{trigger}' for trigger in ('insert', 'delete', 'update')
+)
+# Вес названия в ранжировании относительно описания.
+NAME_WEIGHT = 10.0
+WORD_RE = re.compile(r'\w+')
+
+
+def get_terms(query):
+    """Слова поискового запроса без операторов полнотекстового поиска."""
+    return WORD_RE.findall(query.lower())
+
+
+class SearchBackend:
+    """Поиск произведений по названию и описанию.
+
+    `search` отбирает произведения, подходящие под все слова запроса (слова
+    ищутся по префиксу), и сортирует их по релевантности. `install` создаёт
+    индекс, `rebuild` заполняет его заново по таблице произведений.
+    """
+
+    vendor = None
+
+    def install(self, cursor):
+        """Создаёт индекс, если его ещё нет."""
+
+    def uninstall(self, cursor):
+        """Удаляет индекс."""
+
+    def rebuild(self, cursor):
+        """Переиндексирует все произведения."""
+
+    def is_installed(self):
+        return True
+
+    def search(self, queryset, query):
+        terms = get_terms(query)
+        if not terms:
+            return queryset
+        return self.filter(queryset, terms)
+
+    def filter(self, queryset, terms):
+        for term in terms:
+            queryset = queryset.filter(name__icontains=term)
+        return queryset
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Индекс FTS5 с внешним содержимым из таблицы произведений.
+
+    Индекс поддерживается триггерами, поэтому bulk_create, bulk_update и
+    QuerySet.update его не обходят. Триггер обновления срабатывает только на
+    изменение названия или описания.
+    """
+
+    vendor = 'sqlite'
+
+    def install(self, cursor):
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+            f"name, description, content='{TITLE_TABLE}', "
+            f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')"
+        )
+        insert = (
+            f'INSERT INTO {FTS_TABLE}(rowid, name, description) '
+            f'VALUES (new.id, new.name, new.description);'
+        )
+        delete = (
+            f'INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description) '
+            f"VALUES ('delete', old.id, old.name, old.description);"
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert '
+            f'AFTER INSERT ON {TITLE_TABLE} BEGIN {insert} END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete '
+            f'AFTER DELETE ON {TITLE_TABLE} BEGIN {delete} END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+            f'AFTER UPDATE OF name, description ON {TITLE_TABLE} '
+            f'BEGIN {delete} {insert} END'
+        )
+
+    def uninstall(self, cursor):
+        for trigger in FTS_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def rebuild(self, cursor):
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+        )
+
+    def is_installed(self):
+        """Индекс есть и поддерживается всеми триггерами.
+
+        SQLite удаляет триггеры вместе с таблицей, например когда миграция
+        пересоздаёт таблицу произведений, а индекс без триггеров устаревает.
+        """
+        with connection.cursor() as cursor:
+            if FTS_TABLE not in connection.introspection.table_names(cursor):
+                return False
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' "
+                "AND tbl_name = %s",
+                (TITLE_TABLE,)
+            )
+            return set(FTS_TRIGGERS) <= {row[0] for row in cursor.fetchall()}
+
+    def filter(self, queryset, terms):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        table = queryset.model._meta.db_table
+        return queryset.filter(id__in=RawSQL(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+            (match,)
+        )).annotate(search_rank=RawSQL(
+            f'SELECT -bm25({FTS_TABLE}, {NAME_WEIGHT}, 1.0) '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid = {table}.id',
+            (match,)
+        )).order_by('-search_rank', '-year', 'id')
+
+
+class PostgresBackend(SearchBackend):
+    """tsvector по названию и описанию с GIN индексом по выражению.
+
+    Индекс по выражению PostgreSQL поддерживает сам, запрос повторяет
+    выражение индекса дословно, иначе индекс не используется. Поэтому вектор
+    задан SQL, а не SearchVector: тот оборачивает поля в COALESCE и приведение
+    типа.
+    """
+
+    vendor = 'postgresql'
+    index_name = 'title_search_idx'
+
+    def get_vector(self, table=None):
+        """Выражение индекса, столбцы уточняются таблицей, если она задана."""
+        prefix = f'{connection.ops.quote_name(table)}.' if table else ''
+        return (
+            f"setweight(to_tsvector('simple', {prefix}name), 'A') || "
+            f"setweight(to_tsvector('simple', {prefix}description), 'B')"
+        )
+
+    def install(self, cursor):
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {self.index_name} ON {TITLE_TABLE} '
+            f'USING gin (({self.get_vector()}))'
+        )
+
+    def uninstall(self, cursor):
+        cursor.execute(f'DROP INDEX IF EXISTS {self.index_name}')
+
+    def filter(self, queryset, terms):
+        # psycopg2 нужен только с PostgreSQL.
+        from django.contrib.postgres.search import (
+            SearchQuery, SearchRank, SearchVectorField)
+
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            config='simple', search_type='raw'
+        )
+        vector = RawSQL(
+            self.get_vector(queryset.model._meta.db_table), (),
+            output_field=SearchVectorField()
+        )
+        return queryset.annotate(search_vector=vector).filter(
+            search_vector=query
+        ).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', '-year', 'id')
+
+
+BACKENDS = {
+    backend.vendor: backend
+    for backend in (SQLiteFTSBackend(), PostgresBackend())
+}
+fallback = SearchBackend()
+_installed = {}
+
+
+def get_search_backend():
+    """Бэкенд поиска для текущей базы данных.
+
+    Если база не поддерживает полнотекстовый поиск или индекс не создан,
+    используется поиск подстроки в названии.
+    """
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None:
+        return fallback
+    if connection.vendor not in _installed:
+        _installed[connection.vendor] = backend.is_installed()
+    return backend if _installed[connection.vendor] else fallback
+
+
+def install_search_index():
+    """Создаёт недостающие части индекса и переиндексирует произведения."""
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None:
+        return False
+    with transaction.atomic(), connection.cursor() as cursor:
+        backend.install(cursor)
+        backend.rebuild(cursor)
+    _installed.pop(connection.vendor, None)
+    return True
@@ -0,0 +1,80 @@
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_migrate, post_save, pre_delete)
+from django.dispatch import receiver
+
+from reviews.models import Category, Genre, Review, Title
+from reviews.search import BACKENDS, TITLE_TABLE, install_search_index
+
+
+# id произведений, удаляемых в текущем потоке: их отзывы удаляются
+# каскадом, и пересчитывать рейтинг не нужно.
+deleting_titles = threading.local()
+
+
+@receiver(pre_delete, sender=Title)
+def mark_title_deleting(sender, instance, **kwargs):
+    if not hasattr(deleting_titles, 'ids'):
+        deleting_titles.ids = set()
+    deleting_titles.ids.add(instance.pk)
+
+
+@receiver(post_delete, sender=Title)
+def unmark_title_deleting(sender, instance, **kwargs):
+    deleting_titles.ids.discard(instance.pk)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, **kwargs):
+    """Вычитает оценку удалённого отзыва из рейтинга произведения."""
+    if instance.title_id in getattr(deleting_titles, 'ids', ()):
+        return
+    Title.objects.shift_rating(instance.title_id, -instance.score, -1)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def touch_title_on_genre_change(sender, instance, action, reverse, pk_set,
+                                **kwargs):
+    """Меняет версию произведений при изменении их жанров."""
+    if reverse and action == 'pre_clear':
+        Title.objects.filter(genre=instance).touch()
+    elif action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            Title.objects.filter(pk=instance.pk).touch()
+        elif pk_set:
+            Title.objects.filter(pk__in=pk_set).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_category_titles(sender, instance, **kwargs):
+    """Меняет версию произведений, в ответах которых выводится категория."""
+    if not kwargs.get('created'):
+        Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_genre_titles(sender, instance, **kwargs):
+    """Меняет версию произведений, в ответах которых выводится жанр."""
+    if not kwargs.get('created'):
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_migrate)
+def reinstall_search_index(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Восстанавливает индекс поиска, если миграции удалили его триггеры."""
+    if sender.name != 'reviews' or using != connection.alias:
+        return
+    if TITLE_TABLE not in connection.introspection.table_names():
+        return
+    backend = BACKENDS.get(connection.vendor)
+    if backend is None or backend.is_installed():
+        return
+    try:
+        install_search_index()
+    except OperationalError:
+        # SQLite может быть собран без FTS5, тогда поиск идёт по подстроке.
+        pass
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from .models import User
+from .models import APIKey, User
 
 
 @admin.register(User)
@@ -20,3 +20,20 @@ class UserAdmin(BaseUserAdmin):
     fieldsets = BaseUserAdmin.fieldsets + (
         ('Extra Fields', {'fields': ('bio', 'role',)}),
     )
+
+
+@admin.register(APIKey)
+class APIKeyAdmin(admin.ModelAdmin):
+    list_display = ('name',
+                    'prefix',
+                    'user',
+                    'scopes',
+                    'is_active',
+                    'expires_at',
+                    'last_used_at',
+                    'usage_count',
+                    )
+    search_fields = ('name', 'prefix', 'user__username')
+    list_filter = ('is_active',)
+    list_editable = ('is_active',)
+    readonly_fields = ('prefix', 'created', 'last_used_at', 'usage_count')
@@ -1,2 +1,6 @@
 USER_MAX_LENGTH = 150
 EMAIL_MAX_LENGTH = 254
+API_KEY_PREFIX_LENGTH = 8
+API_KEY_CREATE_ATTEMPTS = 5
+API_KEY_NAME_MAX_LENGTH = 100
+USERNAME_GRAM_SIZE = 3
@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from users.models import APIKey
+
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Create an API key for a user and print it once'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='user the key acts as')
+        parser.add_argument(
+            '--name',
+            default='',
+            help='human readable key name (username by default)'
+        )
+        parser.add_argument(
+            '--scope',
+            action='append',
+            choices=APIKey.SCOPES,
+            help='granted scope, may be repeated (read by default)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='key lifetime in days (no expiry by default)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User {options["username"]} does not exist')
+
+        api_key, raw_key = APIKey.objects.create_key(
+            user,
+            options['name'] or user.username,
+            options['scope'] or (APIKey.READ,)
+        )
+        if options['days'] is not None:
+            api_key.expires_at = (
+                timezone.now() + timedelta(days=options['days'])
+            )
+            api_key.save(update_fields=('expires_at',))
+
+        self.stdout.write(
+            f'Key {api_key.prefix} created with scopes {api_key.scopes}'
+        )
+        self.stdout.write(raw_key)
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from users.models import UsernameTrigram
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the username n-gram index used by user search'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='users indexed per query'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('Batch size must be positive')
+        with transaction.atomic():
+            UsernameTrigram.objects.rebuild(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {UsernameTrigram.objects.count()} username n-grams'
+        ))
@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-18 18:16
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APIKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('prefix', models.CharField(editable=False, max_length=8, unique=True, verbose_name='Префикс')),
+                ('hashed_secret', models.CharField(editable=False, max_length=64, verbose_name='Хеш секрета')),
+                ('scopes', models.CharField(default='read', help_text='Через запятую: read, write', max_length=50, verbose_name='Области доступа')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Активен')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='Действует до')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Создан')),
+                ('last_used_at', models.DateTimeField(editable=False, null=True, verbose_name='Последнее использование')),
+                ('usage_count', models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Число запросов')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='api_keys', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'API-ключ',
+                'verbose_name_plural': 'API-ключи',
+                'ordering': ('-created',),
+            },
+        ),
+    ]
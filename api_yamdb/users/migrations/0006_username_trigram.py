@@ -0,0 +1,57 @@
+# Generated by Django 3.2 on 2026-10-18 18:35
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия users.models.get_username_grams на момент миграции: исторические
+# миграции не должны зависеть от кода приложения.
+GRAM_SIZE = 3
+BATCH_SIZE = 1000
+
+
+def get_username_grams(username):
+    username = username.lower()
+    return {
+        username[start:start + GRAM_SIZE]
+        for start in range(len(username) - GRAM_SIZE + 1)
+    }
+
+
+def index_usernames(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    UsernameTrigram = apps.get_model('users', 'UsernameTrigram')
+    batch = []
+    for user_id, username in User.objects.values_list(
+            'id', 'username').iterator(chunk_size=BATCH_SIZE):
+        batch.extend(
+            UsernameTrigram(user_id=user_id, gram=gram)
+            for gram in get_username_grams(username)
+        )
+        if len(batch) >= BATCH_SIZE:
+            UsernameTrigram.objects.bulk_create(batch)
+            batch = []
+    UsernameTrigram.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_user_managers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsernameTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='username_grams', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='usernametrigram',
+            constraint=models.UniqueConstraint(fields=('gram', 'user'), name='unique_username_gram'),
+        ),
+        migrations.RunPython(index_usernames, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,52 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+import hashlib
+import secrets
 
-from .constants import EMAIL_MAX_LENGTH, USER_MAX_LENGTH
+from django.contrib.auth.models import AbstractUser, UserManager
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+
+from .constants import (
+    API_KEY_CREATE_ATTEMPTS, API_KEY_NAME_MAX_LENGTH, API_KEY_PREFIX_LENGTH,
+    EMAIL_MAX_LENGTH, USER_MAX_LENGTH, USERNAME_GRAM_SIZE)
 from .validators import validate_username
 
 
+class YamdbUserManager(UserManager):
+
+    def get_or_register(self, username, email):
+        """Возвращает пользователя с такими username и email, создавая его.
+
+        Существующий пользователь находится одним запросом по обоим
+        уникальным индексам. Новый вставляется с пропуском конфликтов, поэтому
+        параллельные регистрации не падают с IntegrityError. Возвращает None,
+        если username или email заняты другим пользователем.
+        """
+        lookup = Q(username=username) | Q(email=email)
+        matches = list(self.filter(lookup)[:2])
+        created = False
+        if not matches:
+            self.bulk_create(
+                [self.model(username=username, email=email)],
+                ignore_conflicts=True
+            )
+            matches = list(self.filter(lookup)[:2])
+            created = True
+        if len(matches) != 1:
+            return None
+        user = matches[0]
+        if user.username != username or user.email != email:
+            return None
+        if created:
+            # bulk_create не отправляет сигналы, а от них зависят счётчики,
+            # кеши и индекс поиска по таблице пользователей.
+            post_save.send(
+                sender=self.model, instance=user, created=True,
+                update_fields=None, raw=False, using=self.db
+            )
+        return user
+
+
 class User(AbstractUser):
     """Модель пользователя."""
 
@@ -18,6 +60,11 @@ class User(AbstractUser):
         (MODERATOR, 'Модератор')
     )
     ROLE_MAX_LENGTH = max(len(role[0]) for role in CHOICES)
+    # Поля, изменение которых отзывает выданные токены: username и роль
+    # попадают в claims токена, остальные определяют права доступа.
+    PRIVILEGE_FIELDS = (
+        'username', 'role', 'is_staff', 'is_superuser', 'is_active'
+    )
 
     username = models.CharField(verbose_name='Пользователь',
                                 validators=(validate_username,),
@@ -32,6 +79,13 @@ class User(AbstractUser):
                             max_length=ROLE_MAX_LENGTH,
                             choices=CHOICES,
                             default=USER)
+    auth_version = models.PositiveIntegerField(
+        verbose_name='Версия прав доступа',
+        default=0,
+        editable=False
+    )
+
+    objects = YamdbUserManager()
 
     class Meta:
         ordering = ('username',)
@@ -41,6 +95,41 @@ class User(AbstractUser):
     def __str__(self):
         return self.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_privileges = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.PRIVILEGE_FIELDS
+        }
+        if 'username' in field_names:
+            instance._loaded_username = instance.username
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Увеличивает auth_version при изменении username, роли или статуса.
+
+        Токены с устаревшей версией перестают приниматься.
+        """
+        loaded = getattr(self, '_loaded_privileges', {})
+        if any(getattr(self, name) != value for name, value in loaded.items()):
+            self.auth_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {
+                    *kwargs['update_fields'], 'auth_version'
+                }
+        super().save(*args, **kwargs)
+        self._loaded_privileges = {
+            name: getattr(self, name) for name in self.PRIVILEGE_FIELDS
+            if name not in self.get_deferred_fields()
+        }
+        self._loaded_username = self.username
+
+    @property
+    def username_changed(self):
+        """Изменился ли username с момента загрузки из базы."""
+        return self.username != getattr(self, '_loaded_username', None)
+
     @property
     def is_admin(self):
         return self.role == User.ADMIN or self.is_superuser or self.is_staff
@@ -48,3 +137,152 @@ class User(AbstractUser):
     @property
     def is_moderator(self):
         return self.role == User.MODERATOR
+
+
+class UsernameTrigramManager(models.Manager):
+
+    def index_users(self, users):
+        """Заменяет n-граммы username у переданных пользователей."""
+        users = list(users)
+        self.filter(user__in=[user.pk for user in users]).delete()
+        self.bulk_create([
+            self.model(user_id=user.pk, gram=gram)
+            for user in users for gram in get_username_grams(user.username)
+        ])
+
+    def rebuild(self, batch_size=1000):
+        """Строит n-граммы всех пользователей заново."""
+        self.all().delete()
+        users = User.objects.only('username').order_by('pk')
+        last_pk = 0
+        while True:
+            batch = list(users.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return
+            self.bulk_create(
+                [
+                    self.model(user_id=user.pk, gram=gram) for user in batch
+                    for gram in get_username_grams(user.username)
+                ],
+                batch_size=batch_size
+            )
+            last_pk = batch[-1].pk
+
+
+def get_username_grams(username):
+    """Различные n-граммы username в нижнем регистре."""
+    username = username.lower()
+    return {
+        username[start:start + USERNAME_GRAM_SIZE]
+        for start in range(len(username) - USERNAME_GRAM_SIZE + 1)
+    }
+
+
+class UsernameTrigram(models.Model):
+    """N-грамма username для поиска по подстроке."""
+
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='username_grams')
+    gram = models.CharField(max_length=USERNAME_GRAM_SIZE)
+
+    objects = UsernameTrigramManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['gram', 'user'], name='unique_username_gram'),
+        ]
+
+    def __str__(self):
+        return self.gram
+
+
+def hash_api_key_secret(secret):
+    """Хеш секрета API-ключа.
+
+    Секрет случайный и длинный, поэтому медленный хеш паролей не нужен.
+    """
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+class APIKeyManager(models.Manager):
+
+    def create_key(self, user, name, scopes):
+        """Создаёт ключ, возвращает пару (ключ, строка ключа).
+
+        Строка ключа показывается один раз, в базе хранится только хеш.
+        Префикс уникален, при совпадении с существующим он генерируется
+        заново, каждая попытка выполняется в точке сохранения.
+        """
+        for attempt in range(1, API_KEY_CREATE_ATTEMPTS + 1):
+            prefix = secrets.token_hex(API_KEY_PREFIX_LENGTH // 2)
+            secret = secrets.token_urlsafe(32)
+            try:
+                with transaction.atomic():
+                    api_key = self.create(
+                        user=user,
+                        name=name,
+                        prefix=prefix,
+                        hashed_secret=hash_api_key_secret(secret),
+                        scopes=','.join(sorted(set(scopes)))
+                    )
+            except IntegrityError:
+                if attempt == API_KEY_CREATE_ATTEMPTS:
+                    raise
+                continue
+            return api_key, f'{prefix}.{secret}'
+
+
+class APIKey(models.Model):
+    """Долгоживущий ключ доступа к API для внешних сервисов."""
+
+    READ = 'read'
+    WRITE = 'write'
+    SCOPES = (READ, WRITE)
+
+    user = models.ForeignKey(User,
+                             verbose_name='Пользователь',
+                             on_delete=models.CASCADE,
+                             related_name='api_keys')
+    name = models.CharField(verbose_name='Название',
+                            max_length=API_KEY_NAME_MAX_LENGTH)
+    prefix = models.CharField(verbose_name='Префикс',
+                              max_length=API_KEY_PREFIX_LENGTH,
+                              unique=True,
+                              editable=False)
+    hashed_secret = models.CharField(verbose_name='Хеш секрета',
+                                     max_length=64,
+                                     editable=False)
+    scopes = models.CharField(verbose_name='Области доступа',
+                              max_length=50,
+                              default=READ,
+                              help_text='Через запятую: read, write')
+    is_active = models.BooleanField(verbose_name='Активен', default=True)
+    expires_at = models.DateTimeField(verbose_name='Действует до',
+                                      null=True,
+                                      blank=True)
+    created = models.DateTimeField(verbose_name='Создан',
+                                   auto_now_add=True)
+    last_used_at = models.DateTimeField(verbose_name='Последнее использование',
+                                        null=True,
+                                        editable=False)
+    usage_count = models.PositiveBigIntegerField(
+        verbose_name='Число запросов',
+        default=0,
+        editable=False
+    )
+
+    objects = APIKeyManager()
+
+    class Meta:
+        ordering = ('-created',)
+        verbose_name = 'API-ключ'
+        verbose_name_plural = 'API-ключи'
+
+    def __str__(self):
+        return f'{self.name} ({self.prefix})'
+
+    @property
+    def scope_set(self):
+        return frozenset(filter(None, self.scopes.split(',')))
@@ -0,0 +1,36 @@
+from django.db.models import Count
+
+from .constants import USERNAME_GRAM_SIZE
+from .models import UsernameTrigram, get_username_grams
+
+
+PREFIX_MARK = '*'
+# Наибольший символ Unicode: все строки с префиксом меньше prefix + MAX_CHAR.
+MAX_CHAR = '\U0010ffff'
+
+
+def search_usernames(queryset, term):
+    """Отбирает пользователей по части username.
+
+    `term*` ищется по префиксу диапазоном по уникальному индексу username,
+    с учётом регистра. Остальные запросы ищутся по подстроке без учёта
+    регистра: кандидаты, у которых есть все n-граммы запроса, берутся из
+    индекса n-грамм и проверяются на вхождение. У запросов короче n-граммы
+    n-грамм нет, они проверяются на вхождение без индекса.
+    """
+    if term.endswith(PREFIX_MARK):
+        prefix = term.rstrip(PREFIX_MARK)
+        if not prefix:
+            return queryset
+        return queryset.filter(
+            username__gte=prefix, username__lt=prefix + MAX_CHAR
+        )
+    if len(term) < USERNAME_GRAM_SIZE:
+        return queryset.filter(username__icontains=term)
+    grams = get_username_grams(term)
+    candidates = UsernameTrigram.objects.filter(
+        gram__in=grams
+    ).values('user').annotate(
+        matched=Count('gram')
+    ).filter(matched=len(grams)).values('user')
+    return queryset.filter(pk__in=candidates, username__icontains=term)
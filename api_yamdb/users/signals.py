@@ -0,0 +1,18 @@
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import User, UsernameTrigram, get_username_grams
+
+
+@receiver(post_save, sender=User)
+def index_username(sender, instance, created, raw, **kwargs):
+    """Обновляет n-граммы username нового или переименованного пользователя."""
+    if raw or not (created or instance.username_changed):
+        return
+    if created:
+        UsernameTrigram.objects.bulk_create([
+            UsernameTrigram(user=instance, gram=gram)
+            for gram in get_username_grams(instance.username)
+        ], ignore_conflicts=True)
+    else:
+        UsernameTrigram.objects.index_users([instance])
@@ -7,6 +7,9 @@ esac
 cd ../api_yamdb/
 $python manage.py migrate
 $python manage.py flush --no-input
+if [ "$1" = "--with-data" ]; then
+    $python manage.py import_all static/data
+fi
 echo "from django.contrib.auth import get_user_model; User = get_user_model(); \
     u, _ = User.objects.get_or_create(username='superuser'); u.is_superuser = True; u.is_staff = True; u.email = 'superuser@admin.ru'; u.set_password('5eCretPaSsw0rD'); u.save(); \
     u, _ = User.objects.get_or_create(username='admin-user'); u.is_superuser = False; u.is_staff = False; u.role = 'admin'; u.email = 'admin-user@admin.ru'; u.set_password('5eCretPaSsw0rD'); u.save(); \
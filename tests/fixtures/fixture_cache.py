@@ -0,0 +1,15 @@
+import pytest
+from django.core.cache import caches
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Сбрасывает кеши между тестами: база очищается без сигналов."""
+    from api.cache import response_cache_stats
+    from api.throttling import memory_store
+
+    for cache in caches.all():
+        cache.clear()
+    memory_store.clear()
+    response_cache_stats.reset()
+    yield
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def sync_email_delivery(settings):
+    """Письма отправляются сразу, чтобы тесты видели их в mail.outbox."""
+    settings.EMAIL_DELIVERY_MODE = 'sync'
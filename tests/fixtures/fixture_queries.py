@@ -0,0 +1,116 @@
+from contextlib import contextmanager
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+# Максимальное число SQL-запросов на один запрос к эндпоинту по методам.
+# Бюджет не должен зависеть от количества объектов в базе.
+QUERY_BUDGETS = {
+    'category-list': {'GET': 3, 'POST': 3},
+    'category-detail': {'DELETE': 7},
+    'genre-list': {'GET': 3, 'POST': 3},
+    'genre-detail': {'DELETE': 7},
+    'title-list': {'GET': 4, 'POST': 11},
+    'title-detail': {'GET': 4, 'PATCH': 7, 'DELETE': 11},
+    'title-reviews-list': {'GET': 4, 'POST': 6},
+    'title-reviews-detail': {'GET': 4, 'PATCH': 8, 'DELETE': 8},
+    'review-comments-list': {'GET': 4, 'POST': 3},
+    'review-comments-detail': {'GET': 4, 'PATCH': 4, 'DELETE': 5},
+    'users-list': {'GET': 3, 'POST': 6},
+    'users-detail': {'GET': 2, 'PATCH': 3, 'DELETE': 15},
+    'users-me': {'GET': 1, 'PATCH': 2},
+    'signup': {'POST': 7},
+    'token': {'POST': 1},
+    'cache-stats': {'GET': 1},
+    'email-stats': {'GET': 2},
+}
+
+
+@contextmanager
+def assert_query_budget(endpoint, method='GET', budget=None):
+    """Проверяет, что внутри блока выполнено не больше запросов к БД,
+    чем разрешено бюджетом эндпоинта."""
+    if budget is None:
+        budget = QUERY_BUDGETS[endpoint][method]
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    executed = len(context.captured_queries)
+    queries = '\n'.join(query['sql'] for query in context.captured_queries)
+    assert executed <= budget, (
+        f'Эндпоинт `{method} {endpoint}` выполнил {executed} SQL-запросов при '
+        f'бюджете {budget}:\n{queries}'
+    )
+
+
+@pytest.fixture
+def query_budget():
+    return assert_query_budget
+
+
+@pytest.fixture
+def catalog_factory(django_user_model):
+    """Создаёт по `count` объектов каждой модели каталога пакетно.
+
+    Все отзывы оставлены к первому произведению, все комментарии - к
+    первому отзыву.
+    """
+    from reviews.models import Category, Comment, Genre, Review, Title
+
+    def create(count):
+        django_user_model.objects.bulk_create(
+            django_user_model(
+                username=f'author_{idx:03}',
+                email=f'author_{idx:03}@yamdb.fake'
+            )
+            for idx in range(count)
+        )
+        author_ids = list(
+            django_user_model.objects.filter(
+                username__startswith='author_'
+            ).order_by('username').values_list('id', flat=True)
+        )
+        Category.objects.bulk_create(
+            Category(id=idx, name=f'Категория {idx}', slug=f'category-{idx}')
+            for idx in range(1, count + 1)
+        )
+        Genre.objects.bulk_create(
+            Genre(id=idx, name=f'Жанр {idx}', slug=f'genre-{idx}')
+            for idx in range(1, count + 1)
+        )
+        Title.objects.bulk_create(
+            Title(
+                id=idx, name=f'Произведение {idx}', year=2000,
+                category_id=idx
+            )
+            for idx in range(1, count + 1)
+        )
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title_id=idx, genre_id=genre_id)
+            for idx in range(1, count + 1)
+            for genre_id in {1, idx}
+        )
+        Review.objects.bulk_create(
+            Review(
+                id=idx, title_id=1, author_id=author_id,
+                text=f'Отзыв {idx}', score=idx % 10 + 1
+            )
+            for idx, author_id in enumerate(author_ids, 1)
+        )
+        Comment.objects.bulk_create(
+            Comment(
+                id=idx, review_id=1, author_id=author_id,
+                text=f'Комментарий {idx}'
+            )
+            for idx, author_id in enumerate(author_ids, 1)
+        )
+        Title.objects.rebuild_ratings()
+        return {
+            'title_id': 1,
+            'review_id': 1,
+            'comment_id': 1,
+            'username': 'author_000',
+        }
+
+    return create
@@ -0,0 +1,80 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def test_01_rating_follows_review_changes(self, admin_client, admin,
+                                              user_client, user):
+        from reviews.models import Title
+
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.rating_count) == (10, 2), (
+            'Проверьте, что при создании отзыва его оценка добавляется к '
+            'сохранённому рейтингу произведения.'
+        )
+
+        user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[1]['id']
+            ),
+            data={'score': 1}
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (6, 2), (
+            'Проверьте, что при изменении оценки отзыва сохранённый рейтинг '
+            'произведения пересчитывается.'
+        )
+        response = admin_client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.json()['rating'] == 3
+
+        admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[0]['id']
+            )
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (1, 1), (
+            'Проверьте, что при удалении отзыва его оценка вычитается из '
+            'сохранённого рейтинга произведения.'
+        )
+
+    def test_02_rebuild_ratings_command(self, admin_client, admin):
+        from reviews.models import Title
+
+        _, titles = create_reviews(admin_client, {admin: admin_client})
+        call_command('rebuild_ratings', '--check')
+
+        stale_id, consistent_id = titles[0]['id'], titles[1]['id']
+        versions = dict(Title.objects.values_list('id', 'version'))
+        Title.objects.filter(pk=stale_id).update(rating_sum=0, rating_count=0)
+        with pytest.raises(CommandError):
+            call_command('rebuild_ratings', '--check')
+
+        call_command('rebuild_ratings')
+        title = Title.objects.get(pk=stale_id)
+        assert (title.rating_sum, title.rating_count) == (5, 1)
+        call_command('rebuild_ratings', '--check')
+        assert title.version == versions[stale_id] + 1, (
+            'Проверьте, что пересчёт рейтинга увеличивает версию '
+            'исправленного произведения, чтобы сбросить ETag.'
+        )
+        assert Title.objects.get(
+            pk=consistent_id).version == versions[consistent_id], (
+            'Проверьте, что пересчёт рейтинга не меняет версию произведений '
+            'с верным рейтингом.'
+        )
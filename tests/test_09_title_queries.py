@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09TitleQueries:
+
+    TITLES_URL = '/api/v1/titles/'
+    TITLES_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+
+    @staticmethod
+    def create_titles(count):
+        from reviews.models import Category, Genre, Title
+
+        category = Category.objects.create(name='Фильм', slug='films')
+        genres = (
+            Genre.objects.create(name='Драма', slug='drama'),
+            Genre.objects.create(name='Комедия', slug='comedy'),
+        )
+        titles = [
+            Title.objects.create(
+                name=f'Произведение {idx}', year=2000, category=category
+            )
+            for idx in range(count)
+        ]
+        for title in titles:
+            title.genre.set(genres)
+        return titles
+
+    @pytest.mark.parametrize('titles_count', (1, 10))
+    def test_01_titles_list_query_count(self, client,
+                                        django_assert_num_queries,
+                                        titles_count):
+        self.create_titles(titles_count)
+        # Количество, произведения с категорией, жанры: ETag списка
+        # считается по поколению каталога без запроса.
+        with django_assert_num_queries(3):
+            response = client.get(self.TITLES_URL)
+        assert len(response.json()['results']) == titles_count
+        assert all(
+            len(title['genre']) == 2 and title['category']['slug'] == 'films'
+            for title in response.json()['results']
+        )
+
+    def test_02_title_detail_query_count(self, client,
+                                         django_assert_num_queries):
+        titles = self.create_titles(1)
+        # ETag, произведение с категорией, жанры.
+        with django_assert_num_queries(3):
+            client.get(
+                self.TITLES_DETAIL_URL_TEMPLATE.format(title_id=titles[0].id)
+            )
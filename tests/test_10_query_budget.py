@@ -0,0 +1,200 @@
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from django.urls import URLPattern, URLResolver
+
+from tests.fixtures.fixture_queries import QUERY_BUDGETS
+
+
+GET_ENDPOINTS = {
+    'category-list': '/api/v1/categories/',
+    'genre-list': '/api/v1/genres/',
+    'title-list': '/api/v1/titles/',
+    'title-detail': '/api/v1/titles/{title_id}/',
+    'title-reviews-list': '/api/v1/titles/{title_id}/reviews/',
+    'title-reviews-detail': (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    ),
+    'review-comments-list': (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    ),
+    'review-comments-detail': (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/'
+    ),
+    'users-list': '/api/v1/users/',
+    'users-detail': '/api/v1/users/{username}/',
+    'users-me': '/api/v1/users/me/',
+    'cache-stats': '/api/v1/cache/stats/',
+    'email-stats': '/api/v1/email/stats/',
+}
+# (маршрут, метод): (адрес, данные, ожидаемый статус ответа).
+WRITE_ENDPOINTS = {
+    ('category-list', 'POST'): (
+        '/api/v1/categories/', {'name': 'Новая', 'slug': 'new'}, 201
+    ),
+    ('category-detail', 'DELETE'): (
+        '/api/v1/categories/category-1/', None, 204
+    ),
+    ('genre-list', 'POST'): (
+        '/api/v1/genres/', {'name': 'Новый', 'slug': 'new'}, 201
+    ),
+    ('genre-detail', 'DELETE'): ('/api/v1/genres/genre-1/', None, 204),
+    ('title-list', 'POST'): (
+        '/api/v1/titles/',
+        {
+            'name': 'Новое', 'year': 2000, 'category': 'category-1',
+            'genre': ['genre-1'],
+        },
+        201
+    ),
+    ('title-detail', 'PATCH'): (
+        '/api/v1/titles/{title_id}/', {'name': 'Изменено'}, 200
+    ),
+    ('title-detail', 'DELETE'): ('/api/v1/titles/{title_id}/', None, 204),
+    ('title-reviews-list', 'POST'): (
+        '/api/v1/titles/{title_id}/reviews/',
+        {'text': 'Новый отзыв', 'score': 7},
+        201
+    ),
+    ('title-reviews-detail', 'PATCH'): (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/',
+        {'text': 'Изменено', 'score': 3},
+        200
+    ),
+    ('title-reviews-detail', 'DELETE'): (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/', None, 204
+    ),
+    ('review-comments-list', 'POST'): (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        {'text': 'Новый комментарий'},
+        201
+    ),
+    ('review-comments-detail', 'PATCH'): (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/',
+        {'text': 'Изменено'},
+        200
+    ),
+    ('review-comments-detail', 'DELETE'): (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/',
+        None,
+        204
+    ),
+    ('users-list', 'POST'): (
+        '/api/v1/users/',
+        {'username': 'new_user', 'email': 'new_user@yamdb.fake'},
+        201
+    ),
+    ('users-detail', 'PATCH'): (
+        '/api/v1/users/{username}/', {'bio': 'Изменено'}, 200
+    ),
+    ('users-detail', 'DELETE'): ('/api/v1/users/{username}/', None, 204),
+    ('users-me', 'PATCH'): ('/api/v1/users/me/', {'bio': 'Изменено'}, 200),
+}
+MEASURED = (
+    {(endpoint, 'GET') for endpoint in GET_ENDPOINTS}
+    | set(WRITE_ENDPOINTS)
+    | {('signup', 'POST'), ('token', 'POST')}
+)
+OBJECTS_COUNTS = (1, 10, 100)
+
+
+def get_routes(patterns):
+    """Пары (имя маршрута, HTTP-метод) всех эндпоинтов из patterns."""
+    routes = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            routes |= get_routes(pattern.url_patterns)
+            continue
+        if not isinstance(pattern, URLPattern) or pattern.name == 'api-root':
+            continue
+        view = pattern.callback.cls
+        actions = getattr(pattern.callback, 'actions', None)
+        methods = actions or [
+            method for method in view.http_method_names
+            if hasattr(view, method)
+        ]
+        routes |= {
+            (pattern.name, method.upper()) for method in methods
+            if method in view.http_method_names
+            and method not in ('head', 'options')
+        }
+    return routes
+
+
+def test_every_endpoint_has_budget():
+    from api.urls import urlpatterns
+
+    routes = get_routes(urlpatterns)
+    assert ('title-detail', 'PATCH') in routes
+    missing = {
+        f'{method} {name}' for name, method in routes
+        if method not in QUERY_BUDGETS.get(name, {})
+    }
+    assert not missing, (
+        f'Для эндпоинтов {", ".join(sorted(missing))} не задан бюджет '
+        'SQL-запросов.'
+    )
+    unmeasured = {f'{method} {name}' for name, method in routes - MEASURED}
+    assert not unmeasured, (
+        f'Для эндпоинтов {", ".join(sorted(unmeasured))} нет проверки '
+        'бюджета SQL-запросов.'
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10QueryBudget:
+
+    @pytest.mark.parametrize('objects_count', OBJECTS_COUNTS)
+    @pytest.mark.parametrize('endpoint', GET_ENDPOINTS)
+    def test_01_get_endpoints(self, admin_client, catalog_factory,
+                              query_budget, endpoint, objects_count):
+        url = GET_ENDPOINTS[endpoint].format(**catalog_factory(objects_count))
+        with query_budget(endpoint):
+            response = admin_client.get(url)
+        assert response.status_code == 200, (
+            f'GET-запрос администратора к `{url}` должен возвращать ответ '
+            'со статусом 200.'
+        )
+
+    @pytest.mark.parametrize('objects_count', OBJECTS_COUNTS)
+    @pytest.mark.parametrize('endpoint', WRITE_ENDPOINTS)
+    def test_02_write_endpoints(self, admin_client, catalog_factory,
+                                query_budget, endpoint, objects_count):
+        name, method = endpoint
+        url, data, expected_status = WRITE_ENDPOINTS[endpoint]
+        url = url.format(**catalog_factory(objects_count))
+        send = getattr(admin_client, method.lower())
+        with query_budget(name, method):
+            response = send(url, data=data)
+        assert response.status_code == expected_status, (
+            f'{method}-запрос администратора к `{url}` должен возвращать '
+            f'ответ со статусом {expected_status}.'
+        )
+
+    @pytest.mark.parametrize('objects_count', OBJECTS_COUNTS)
+    def test_03_signup(self, client, catalog_factory, query_budget,
+                       settings, objects_count):
+        # Доставка письма не входит в обработку запроса.
+        settings.EMAIL_DELIVERY_MODE = 'outbox'
+        catalog_factory(objects_count)
+        with query_budget('signup', 'POST'):
+            response = client.post(
+                '/api/v1/auth/signup/',
+                data={'username': 'new_user', 'email': 'new@yamdb.fake'}
+            )
+        assert response.status_code == 200
+
+    @pytest.mark.parametrize('objects_count', OBJECTS_COUNTS)
+    def test_04_token(self, client, catalog_factory, django_user_model,
+                      query_budget, objects_count):
+        username = catalog_factory(objects_count)['username']
+        user = django_user_model.objects.get(username=username)
+        data = {
+            'username': username,
+            'confirmation_code': default_token_generator.make_token(user),
+        }
+        with query_budget('token', 'POST'):
+            response = client.post('/api/v1/auth/token/', data=data)
+        assert response.status_code == 200
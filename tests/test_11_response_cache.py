@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ResponseCache:
+
+    CATEGORIES_URL = '/api/v1/categories/'
+    TITLES_URL = '/api/v1/titles/'
+    CACHE_STATS_URL = '/api/v1/cache/stats/'
+
+    def test_01_repeated_get_is_served_from_cache(
+            self, client, admin_client, django_assert_num_queries
+    ):
+        create_titles(admin_client)
+        response = client.get(self.TITLES_URL)
+        assert response['X-Cache'] == 'MISS'
+
+        # ETag списка считается по поколению каталога, без запросов.
+        with django_assert_num_queries(0):
+            cached_response = client.get(self.TITLES_URL)
+        assert cached_response['X-Cache'] == 'HIT', (
+            f'Повторный GET-запрос к `{self.TITLES_URL}` должен '
+            'обслуживаться из кеша.'
+        )
+        assert cached_response.json() == response.json()
+
+        response = client.get(self.TITLES_URL, {'year': 1984})
+        assert response['X-Cache'] == 'MISS', (
+            'Ключ кеша должен учитывать параметры запроса.'
+        )
+
+    def test_02_writes_invalidate_cache(self, client, admin_client,
+                                        user_client):
+        titles, _, _ = create_titles(admin_client)
+        client.get(self.CATEGORIES_URL)
+        admin_client.post(
+            self.CATEGORIES_URL, data={'name': 'Музыка', 'slug': 'music'}
+        )
+        response = client.get(self.CATEGORIES_URL)
+        assert response['X-Cache'] == 'MISS', (
+            'После создания категории кеш списка категорий должен '
+            'сбрасываться.'
+        )
+        assert response.json()['count'] == 3
+
+        title_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        assert client.get(title_url).json()['rating'] is None
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 7)
+        response = client.get(title_url)
+        assert response['X-Cache'] == 'MISS', (
+            'После создания отзыва кеш произведения должен сбрасываться, '
+            'так как от отзывов зависит рейтинг.'
+        )
+        assert response.json()['rating'] == 7
+
+    def test_03_cache_stats(self, client, admin_client, user_client):
+        client.get(self.CATEGORIES_URL)
+        client.get(self.CATEGORIES_URL)
+
+        response = user_client.get(self.CACHE_STATS_URL)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.get(self.CACHE_STATS_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
@@ -0,0 +1,154 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ConditionalGet:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENT_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+        '{comment_id}/'
+    )
+
+    def test_01_titles_not_modified(self, client, admin_client, user_client,
+                                    django_assert_num_queries):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(self.TITLES_URL)
+        etag = response['ETag']
+        assert etag.startswith('W/'), (
+            f'Ответ на GET-запрос к `{self.TITLES_URL}` должен содержать '
+            'слабый ETag.'
+        )
+
+        with django_assert_num_queries(0):
+            response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Если ETag из заголовка `If-None-Match` совпадает с текущим, '
+            'должен вернуться ответ со статусом 304.'
+        )
+
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 3)
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'После изменения рейтинга произведения ETag списка должен '
+            'измениться.'
+        )
+
+        title_url = f'{self.TITLES_URL}{titles[1]["id"]}/'
+        etag = client.get(title_url)['ETag']
+        admin_client.patch(title_url, data={'genre': ['horror']})
+        response = client.get(title_url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'После изменения жанров произведения его ETag должен измениться.'
+        )
+
+    def test_02_reviews_not_modified(self, client, admin_client, admin,
+                                     user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        review_id = create_single_review(
+            user_client, titles[0]['id'], 'Отзыв', 3).json()['id']
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        user_client.patch(f'{url}{review_id}/', data={'text': 'Исправлено'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'После изменения отзыва ETag списка отзывов должен измениться.'
+        )
+
+        etag = response['ETag']
+        user_client.delete(f'{url}{review_id}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'После удаления отзыва ETag списка отзывов должен измениться.'
+        )
+
+    def test_03_comment_last_modified(self, client, admin_client, admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        url = self.COMMENT_DETAIL_URL_TEMPLATE.format(
+            title_id=titles[0]['id'],
+            review_id=reviews[0]['id'],
+            comment_id=comments[0]['id']
+        )
+        response = client.get(url)
+        last_modified = response['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Если объект не изменялся с даты из заголовка '
+            '`If-Modified-Since`, должен вернуться ответ со статусом 304.'
+        )
+
+    def test_04_non_numeric_pk_is_not_found(self, client, admin_client,
+                                            admin):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        for url in (
+            f'{self.TITLES_URL}abc/',
+            self.REVIEWS_URL_TEMPLATE.format(title_id=title_id) + 'abc/',
+            self.COMMENT_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review_id, comment_id='abc'
+            ),
+        ):
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'GET-запрос к `{url}` с нечисловым id должен возвращать '
+                'ответ со статусом 404.'
+            )
+
+    def test_05_list_validators_do_not_query(self, client, admin_client,
+                                             admin,
+                                             django_assert_num_queries):
+        comments, reviews, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        comments_url = f'{reviews_url}{reviews[0]["id"]}/comments/'
+        for url in (reviews_url, comments_url):
+            etag = client.get(url, {'pagination': 'cursor'})['ETag']
+            with django_assert_num_queries(0):
+                response = client.get(
+                    url, {'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=etag
+                )
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                f'ETag списка `{url}` должен считаться по сохранённым '
+                'метаданным, без запросов к базе.'
+            )
+
+        admin_client.patch(
+            f'{comments_url}{comments[0]["id"]}/', data={'text': 'Изменено'}
+        )
+        response = client.get(
+            comments_url, {'pagination': 'cursor'}, HTTP_IF_NONE_MATCH=etag
+        )
+        assert response.status_code == HTTPStatus.OK
+
+    def test_06_rebuild_ratings_changes_list_etag(self, client,
+                                                  admin_client, admin):
+        from django.core.management import call_command
+
+        from reviews.models import Title
+
+        _, _, titles = create_comments(
+            admin_client, {admin: admin_client}
+        )
+        Title.objects.filter(pk=titles[0]['id']).update(rating_sum=0)
+        etag = client.get(self.TITLES_URL)['ETag']
+        call_command('rebuild_ratings')
+        response = client.get(self.TITLES_URL, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Пересчёт рейтингов командой должен менять ETag списка '
+            'произведений.'
+        )
@@ -0,0 +1,69 @@
+from http import HTTPStatus
+
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13KeysetPagination:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    REVIEWS_COUNT = 25
+
+    @pytest.fixture
+    def reviews(self, django_user_model):
+        from reviews.models import Review, Title
+
+        title = Title.objects.create(name='Произведение', year=2000)
+        for idx in range(self.REVIEWS_COUNT):
+            author = django_user_model.objects.create(
+                username=f'author_{idx}', email=f'author_{idx}@yamdb.fake'
+            )
+            Review.objects.create(
+                title=title, author=author, text=f'Отзыв {idx}', score=5
+            )
+        # Часть отзывов с одинаковой датой проверяет сортировку по id.
+        first_review = Review.objects.order_by('id').first()
+        Review.objects.filter(id__lte=first_review.id + 9).update(
+            pub_date=first_review.pub_date
+        )
+        expected_ids = list(
+            Review.objects.order_by('-pub_date', '-id').values_list(
+                'id', flat=True)
+        )
+        return title, expected_ids
+
+    def test_01_cursor_walks_all_reviews(self, client, reviews):
+        title, expected_ids = reviews
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        response = client.get(url, {'pagination': 'cursor'})
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        assert 'count' not in data, (
+            'В режиме курсорной пагинации не должно выполняться COUNT(*).'
+        )
+
+        received_ids = []
+        pages = 0
+        while True:
+            received_ids.extend(review['id'] for review in data['results'])
+            pages += 1
+            if not data['next']:
+                break
+            data = client.get(data['next']).json()
+        assert received_ids == expected_ids, (
+            'Курсорная пагинация должна отдавать все отзывы по одному разу '
+            'в порядке (-pub_date, -id).'
+        )
+        assert pages == 3
+
+    def test_02_default_pagination_unchanged(self, client, reviews):
+        title, _ = reviews
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        data = client.get(url).json()
+        assert data['count'] == self.REVIEWS_COUNT
+
+    def test_03_invalid_cursor(self, client, reviews):
+        title, _ = reviews
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=title.id)
+        response = client.get(url, {'cursor': 'broken'})
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,67 @@
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14CachedCount:
+
+    USERS_URL = '/api/v1/users/'
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_count_is_cached_until_write(self, admin_client,
+                                            django_assert_num_queries):
+        admin_client.get(self.USERS_URL)
+        # Пользователь из токена и выборка страницы, без COUNT(*).
+        with django_assert_num_queries(2):
+            response = admin_client.get(self.USERS_URL)
+        assert response.json()['count'] == 1
+
+        admin_client.post(
+            self.USERS_URL,
+            data={'username': 'new_user', 'email': 'new_user@yamdb.fake'}
+        )
+        response = admin_client.get(self.USERS_URL)
+        assert response.json()['count'] == 2, (
+            'После создания пользователя кешированное количество объектов '
+            'должно сбрасываться.'
+        )
+
+    def test_02_count_depends_on_filter(self, admin_client):
+        from reviews.models import Category, Title
+
+        category = Category.objects.create(name='Фильм', slug='films')
+        Title.objects.create(name='Первое', year=2000, category=category)
+        Title.objects.create(name='Второе', year=2001)
+
+        assert admin_client.get(self.TITLES_URL).json()['count'] == 2
+        response = admin_client.get(self.TITLES_URL, {'category': 'films'})
+        assert response.json()['count'] == 1
+
+        Title.objects.create(name='Третье', year=2002, category=category)
+        response = admin_client.get(self.TITLES_URL, {'category': 'films'})
+        assert response.json()['count'] == 2
+
+    def test_03_estimated_count(self, admin_client, settings, monkeypatch):
+        settings.API_COUNT_ESTIMATE_THRESHOLD = 1000
+        monkeypatch.setattr(
+            'api.pagination.estimate_count', lambda queryset: 10 ** 6
+        )
+        response = admin_client.get(self.USERS_URL)
+        assert response.json()['count'] == 10 ** 6
+        assert response['X-Count-Estimated'] == 'true'
+
+    def test_04_count_follows_subquery_tables(self, admin_client):
+        from reviews.models import Genre, Title
+
+        genre = Genre.objects.create(name='Драма', slug='drama')
+        first = Title.objects.create(name='Первое', year=2000)
+        second = Title.objects.create(name='Второе', year=2001)
+        first.genre.add(genre)
+        response = admin_client.get(self.TITLES_URL, {'genre': 'drama'})
+        assert response.json()['count'] == 1
+
+        second.genre.add(genre)
+        response = admin_client.get(self.TITLES_URL, {'genre': 'drama'})
+        assert response.json()['count'] == 2, (
+            'Кешированное количество должно сбрасываться при изменении '
+            'таблиц, к которым обращаются подзапросы фильтра.'
+        )
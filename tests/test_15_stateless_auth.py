@@ -0,0 +1,120 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth.tokens import default_token_generator
+from rest_framework.test import APIClient
+from rest_framework.views import APIView
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def stateless_auth(monkeypatch):
+    from api.authentication import StatelessJWTAuthentication, auth_versions
+
+    auth_versions.clear()
+    monkeypatch.setattr(
+        APIView, 'authentication_classes', (StatelessJWTAuthentication,)
+    )
+
+
+def get_token_client(user):
+    response = APIClient().post(
+        '/api/v1/auth/token/',
+        data={
+            'username': user.username,
+            'confirmation_code': default_token_generator.make_token(user),
+        }
+    )
+    assert response.status_code == HTTPStatus.OK
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15StatelessAuth:
+
+    USERS_URL = '/api/v1/users/'
+
+    def test_01_user_not_loaded_per_request(self, admin, stateless_auth,
+                                            django_assert_num_queries):
+        client = get_token_client(admin)
+        client.get(self.USERS_URL)
+        # Только COUNT(*) и выборка страницы: пользователь собран из токена,
+        # версия прав взята из кеша процесса.
+        with django_assert_num_queries(2):
+            response = client.get(self.USERS_URL, {'search': 'Test'})
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_role_change_revokes_token(self, admin, admin_client, user,
+                                          stateless_auth):
+        client = get_token_client(user)
+        assert client.get(self.USERS_URL).status_code == HTTPStatus.FORBIDDEN
+
+        admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'role': 'admin'}
+        )
+        response = client.get(self.USERS_URL)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'После смены роли пользователя ранее выданный токен не должен '
+            'приниматься.'
+        )
+        client = get_token_client(user)
+        assert client.get(self.USERS_URL).status_code == HTTPStatus.OK
+
+    def test_03_stateless_user_writes(self, admin, admin_client, user,
+                                      stateless_auth):
+        titles, _, _ = create_titles(admin_client)
+        client = get_token_client(user)
+        response = client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'Отзыв', 'score': 4}
+        )
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['author'] == user.username
+
+        response = client.patch(
+            f'{self.USERS_URL}me/', data={'bio': 'Новая биография'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+        user.refresh_from_db()
+        assert user.bio == 'Новая биография'
+        assert user.check_password('1234567'), (
+            'Изменение профиля по токену не должно затирать остальные поля.'
+        )
+
+    def test_04_username_change_revokes_token(self, admin_client, user,
+                                              django_user_model,
+                                              stateless_auth):
+        client = get_token_client(user)
+        response = admin_client.patch(
+            f'{self.USERS_URL}{user.username}/', data={'username': 'renamed'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(f'{self.USERS_URL}me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'После смены username ранее выданный токен не должен '
+            'приниматься: username берётся из его claims.'
+        )
+
+        user.refresh_from_db()
+        client = get_token_client(user)
+        # Переименование в обход User.save: claims токена устарели, но
+        # профиль всё равно читается и сохраняется по строке из базы.
+        django_user_model.objects.filter(pk=user.pk).update(
+            username='renamed_again'
+        )
+        django_user_model.objects.create_user(
+            username='renamed', email='renamed@yamdb.fake'
+        )
+        response = client.patch(
+            f'{self.USERS_URL}me/', data={'bio': 'Новая биография'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == 'renamed_again'
+        user.refresh_from_db()
+        assert (user.username, user.bio) == (
+            'renamed_again', 'Новая биография'
+        ), 'Изменение профиля не должно записывать username из токена.'
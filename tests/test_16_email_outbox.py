@@ -0,0 +1,254 @@
+import time
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16EmailOutbox:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+
+    def signup(self, client, username='outbox_user'):
+        response = client.post(
+            self.URL_SIGNUP,
+            data={'username': username, 'email': f'{username}@yamdb.fake'}
+        )
+        assert response.status_code == 200
+        return f'{username}@yamdb.fake'
+
+    def test_01_signup_enqueues_email(self, client, settings):
+        from notifications.models import OutgoingEmail
+
+        settings.EMAIL_DELIVERY_MODE = 'outbox'
+        outbox_before_count = len(mail.outbox)
+        email = self.signup(client)
+        assert len(mail.outbox) == outbox_before_count, (
+            'В режиме `outbox` регистрация не должна отправлять письмо '
+            'синхронно.'
+        )
+        queued = OutgoingEmail.objects.get(recipient=email)
+        assert queued.status == OutgoingEmail.PENDING
+
+        call_command('send_emails', '--once')
+        queued.refresh_from_db()
+        assert queued.status == OutgoingEmail.SENT
+        assert mail.outbox[-1].to == [email]
+
+    def test_02_failed_email_is_retried(self, client, settings, monkeypatch):
+        from notifications.models import OutgoingEmail
+
+        settings.EMAIL_DELIVERY_MODE = 'outbox'
+        settings.EMAIL_MAX_ATTEMPTS = 2
+        email = self.signup(client)
+
+        def broken_send(self, *args, **kwargs):
+            raise ConnectionError('SMTP недоступен')
+
+        monkeypatch.setattr(
+            'django.core.mail.EmailMessage.send', broken_send
+        )
+        call_command('send_emails', '--once')
+        queued = OutgoingEmail.objects.get(recipient=email)
+        assert queued.status == OutgoingEmail.PENDING
+        assert queued.attempts == 1
+        assert queued.next_attempt_at > timezone.now(), (
+            'Повторная отправка должна откладываться.'
+        )
+
+        queued.next_attempt_at = timezone.now() - timedelta(seconds=1)
+        queued.save()
+        call_command('send_emails', '--once')
+        queued.refresh_from_db()
+        assert queued.status == OutgoingEmail.FAILED, (
+            'После исчерпания попыток письмо должно помечаться как '
+            'неотправленное.'
+        )
+
+    def test_03_batch_uses_single_connection(self, client, settings,
+                                             monkeypatch):
+        from django.core.mail.backends.locmem import EmailBackend
+
+        settings.EMAIL_DELIVERY_MODE = 'outbox'
+        for idx in range(3):
+            self.signup(client, f'batch_user_{idx}')
+
+        opened = []
+        original_open = EmailBackend.open
+
+        def counting_open(self):
+            opened.append(self)
+            return original_open(self)
+
+        monkeypatch.setattr(EmailBackend, 'open', counting_open)
+        call_command('send_emails', '--once')
+        assert len(opened) == 1
+
+    def test_04_dispatcher_reuses_connection_between_batches(
+            self, client, settings, monkeypatch):
+        from django.core.mail.backends.locmem import EmailBackend
+        from notifications.models import OutgoingEmail
+        from notifications.services import EmailDispatcher, get_queue_depth
+
+        settings.EMAIL_DELIVERY_MODE = 'outbox'
+        for idx in range(5):
+            self.signup(client, f'dispatch_user_{idx}')
+        assert get_queue_depth() == 5
+
+        opened = []
+        original_open = EmailBackend.open
+
+        def counting_open(self):
+            opened.append(self)
+            return original_open(self)
+
+        monkeypatch.setattr(EmailBackend, 'open', counting_open)
+        dispatcher = EmailDispatcher(batch_size=2)
+        assert dispatcher.flush() == 5
+        assert len(opened) == 1, (
+            'Диспетчер должен отправлять все пачки через одно соединение.'
+        )
+        assert get_queue_depth() == 0
+        assert not OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists()
+        stats = dispatcher.stats.as_dict()
+        assert stats['sent'] == 5
+        assert stats['failed'] == 0
+        assert stats['messages_per_second'] > 0
+
+    def test_05_thread_mode_flushes_batch(self, client, settings):
+        from notifications import services
+
+        settings.EMAIL_DELIVERY_MODE = 'thread'
+        settings.EMAIL_BATCH_SIZE = 3
+        settings.EMAIL_FLUSH_INTERVAL = 60
+        dispatcher = services.EmailDispatcher()
+        services._dispatcher = dispatcher
+        try:
+            outbox_before_count = len(mail.outbox)
+            emails = [
+                self.signup(client, f'thread_user_{idx}') for idx in range(3)
+            ]
+            dispatcher.stop(timeout=10)
+        finally:
+            services._dispatcher = None
+        assert sorted(
+            message.to[0] for message in mail.outbox[outbox_before_count:]
+        ) == sorted(emails), (
+            'Фоновый диспетчер должен отправить накопленную пачку писем.'
+        )
+        assert dispatcher.stats.as_dict()['sent'] == 3
+
+    def test_06_email_stats(self, admin_client, settings):
+        settings.EMAIL_DELIVERY_MODE = 'outbox'
+        self.signup(admin_client, 'stats_user')
+        response = admin_client.get('/api/v1/email/stats/')
+        assert response.status_code == 200
+        assert response.json()['queue_depth'] == 1
+        assert set(response.json()) == {
+            'sent', 'failed', 'messages_per_second', 'queue_depth'
+        }
+
+    def test_07_thread_retries_due_email_without_notify(self, client,
+                                                        settings):
+        from notifications import services
+        from notifications.models import OutgoingEmail
+
+        settings.EMAIL_DELIVERY_MODE = 'outbox'
+        email = self.signup(client, 'retry_user')
+        OutgoingEmail.objects.filter(recipient=email).update(
+            attempts=1, last_error='SMTP недоступен',
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        outbox_before_count = len(mail.outbox)
+        dispatcher = services.EmailDispatcher(flush_interval=0.05)
+        dispatcher.start()
+        try:
+            for _ in range(100):
+                if len(mail.outbox) > outbox_before_count:
+                    break
+                time.sleep(0.05)
+        finally:
+            dispatcher.stop(timeout=10)
+        assert [
+            message.to for message in mail.outbox[outbox_before_count:]
+        ] == [[email]], (
+            'Фоновый диспетчер должен повторять отправку писем с истёкшей '
+            'задержкой без новых уведомлений.'
+        )
+        assert OutgoingEmail.objects.get(
+            recipient=email).status == OutgoingEmail.SENT
+
+    def test_08_sent_emails_are_blanked_and_purged(self, client, settings):
+        from notifications.models import OutgoingEmail
+
+        settings.EMAIL_DELIVERY_MODE = 'outbox'
+        email = self.signup(client, 'purge_user')
+        pending = self.signup(client, 'pending_user')
+        OutgoingEmail.objects.filter(recipient=pending).update(
+            next_attempt_at=timezone.now() + timedelta(days=30)
+        )
+        call_command('send_emails', '--once')
+        sent = OutgoingEmail.objects.get(recipient=email)
+        assert sent.status == OutgoingEmail.SENT
+        assert sent.body == '', (
+            'Текст отправленного письма с кодом подтверждения не должен '
+            'храниться в очереди.'
+        )
+        assert 'Ваш код' in mail.outbox[-1].body
+
+        call_command('purge_emails')
+        assert OutgoingEmail.objects.filter(recipient=email).exists()
+        OutgoingEmail.objects.filter(recipient=email).update(
+            next_attempt_at=timezone.now() - timedelta(
+                days=settings.EMAIL_RETENTION_DAYS + 1
+            )
+        )
+        call_command('purge_emails')
+        assert not OutgoingEmail.objects.filter(recipient=email).exists(), (
+            'Отправленные письма старше срока хранения должны удаляться.'
+        )
+        assert OutgoingEmail.objects.filter(recipient=pending).exists()
+
+    def test_09_idle_dispatcher_backs_off_and_wakes_on_enqueue(
+            self, client, settings):
+        from notifications import services
+
+        dispatcher = services.EmailDispatcher(
+            flush_interval=0.1, idle_interval=30
+        )
+        assert [dispatcher.backoff(False) for _ in range(3)] == [
+            0.2, 0.4, 0.8
+        ], 'Пока очередь пуста, пауза диспетчера должна удваиваться.'
+        assert dispatcher.backoff(True) == 0.1, (
+            'После отправки пауза диспетчера должна сбрасываться.'
+        )
+
+        settings.EMAIL_DELIVERY_MODE = 'thread'
+        services._dispatcher = dispatcher
+        dispatcher.start()
+        try:
+            for _ in range(100):
+                if dispatcher._timeout >= 1.6:
+                    break
+                time.sleep(0.05)
+            outbox_before_count = len(mail.outbox)
+            email = self.signup(client, 'idle_user')
+            for _ in range(20):
+                if len(mail.outbox) > outbox_before_count:
+                    break
+                time.sleep(0.05)
+            delivered = [
+                message.to for message in mail.outbox[outbox_before_count:]
+            ]
+        finally:
+            dispatcher.stop(timeout=10)
+            services._dispatcher = None
+        assert delivered == [[email]], (
+            'Письмо, поставленное в очередь во время простоя, должно будить '
+            'диспетчер, а не ждать окончания паузы.'
+        )
@@ -0,0 +1,145 @@
+import pytest
+from django.core import mail
+
+
+@pytest.fixture
+def low_rates(settings):
+    settings.REST_FRAMEWORK = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            'signup_ip': '5/hour',
+            'signup_username': '2/hour',
+            'signup_email': '2/hour',
+            'token_ip': '5/hour',
+            'token_username': '2/hour',
+        },
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Throttling:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    def test_01_signup_throttled_per_username(self, client, low_rates,
+                                              django_assert_num_queries):
+        data = {'username': 'throttled', 'email': 'throttled@yamdb.fake'}
+        for address in ('10.0.0.1', '10.0.0.2'):
+            response = client.post(
+                self.URL_SIGNUP, data=data, REMOTE_ADDR=address
+            )
+            assert response.status_code == 200
+
+        with django_assert_num_queries(0):
+            response = client.post(
+                self.URL_SIGNUP,
+                data={'username': 'THROTTLED', 'email': 'other@yamdb.fake'},
+                REMOTE_ADDR='10.0.0.3'
+            )
+        assert response.status_code == 429, (
+            'Превышение частоты регистраций для одного имени пользователя '
+            'должно отклоняться без обращения к базе данных.'
+        )
+        assert int(response['Retry-After']) > 0
+
+    def test_02_signup_throttled_per_ip(self, client, low_rates):
+        for idx in range(5):
+            response = client.post(
+                self.URL_SIGNUP,
+                data={'username': f'ip_user_{idx}',
+                      'email': f'ip_user_{idx}@yamdb.fake'}
+            )
+            assert response.status_code == 200
+        response = client.post(
+            self.URL_SIGNUP,
+            data={'username': 'ip_user_x', 'email': 'ip_user_x@yamdb.fake'}
+        )
+        assert response.status_code == 429
+        response = client.post(
+            self.URL_SIGNUP,
+            data={'username': 'ip_user_x', 'email': 'ip_user_x@yamdb.fake'},
+            REMOTE_ADDR='10.0.0.9'
+        )
+        assert response.status_code == 200
+
+    def test_03_token_throttled_per_username(self, client, low_rates,
+                                             django_user_model):
+        django_user_model.objects.create_user(
+            username='token_user', email='token_user@yamdb.fake'
+        )
+        data = {'username': 'token_user', 'confirmation_code': 'wrong'}
+        for _ in range(2):
+            assert client.post(self.URL_TOKEN, data=data).status_code == 400
+        assert client.post(self.URL_TOKEN, data=data).status_code == 429
+
+    def test_04_duplicate_confirmation_email_suppressed(self, client):
+        outbox_before_count = len(mail.outbox)
+        data = {'username': 'dedupe_user', 'email': 'dedupe@yamdb.fake'}
+        for _ in range(3):
+            assert client.post(self.URL_SIGNUP, data=data).status_code == 200
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Повторный запрос кода в течение окна не должен отправлять '
+            'новое письмо.'
+        )
+
+    def test_05_failed_enqueue_does_not_suppress_retry(self, client,
+                                                       monkeypatch):
+        from api import views
+
+        enqueue_email = views.enqueue_email
+
+        def broken_enqueue(*args, **kwargs):
+            raise ConnectionError('Очередь писем недоступна')
+
+        outbox_before_count = len(mail.outbox)
+        data = {'username': 'retry_user', 'email': 'retry@yamdb.fake'}
+        monkeypatch.setattr(views, 'enqueue_email', broken_enqueue)
+        with pytest.raises(ConnectionError):
+            client.post(self.URL_SIGNUP, data=data)
+
+        monkeypatch.setattr(views, 'enqueue_email', enqueue_email)
+        assert client.post(self.URL_SIGNUP, data=data).status_code == 200
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Если письмо не удалось поставить в очередь, повторный запрос '
+            'кода должен его отправить.'
+        )
+
+
+def test_memory_store_sliding_window(monkeypatch):
+    from api import throttling
+
+    now = [1000.0]
+    monkeypatch.setattr(throttling.time, 'time', lambda: now[0])
+    store = throttling.MemoryWindowStore()
+    assert store.hit('key', 2, 60)[0]
+    assert store.hit('key', 2, 60)[0]
+    allowed, wait = store.hit('key', 2, 60)
+    assert not allowed and wait > 0
+
+    # Половина окна спустя прошлый интервал учитывается с весом 0.5.
+    now[0] = 1050.0
+    assert store.hit('key', 2, 60)[0]
+    assert not store.hit('key', 2, 60)[0]
+    now[0] = 1200.0
+    assert store.hit('key', 2, 60)[0]
+
+
+def test_cache_store_falls_back_to_memory(monkeypatch):
+    from api import throttling
+
+    class BrokenCache:
+        def __getattr__(self, name):
+            raise ConnectionError('кеш недоступен')
+
+    fallback = throttling.MemoryWindowStore()
+    store = throttling.CacheWindowStore('default', fallback)
+    monkeypatch.setattr(
+        throttling.CacheWindowStore, 'cache',
+        property(lambda self: BrokenCache())
+    )
+    assert store.hit('key', 1, 60)[0]
+    assert not store.hit('key', 1, 60)[0]
+    assert fallback.get_many(list(fallback._data)), (
+        'Счётчики должны вестись в памяти при недоступном кеше.'
+    )
@@ -0,0 +1,130 @@
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def key_caches():
+    from api.authentication import key_usage, verified_keys
+
+    verified_keys.clear()
+    key_usage.flush()
+    yield
+    verified_keys.clear()
+
+
+def create_key(username, *scopes):
+    out = StringIO()
+    args = [username]
+    for scope in scopes:
+        args += ['--scope', scope]
+    call_command('create_api_key', *args, stdout=out)
+    return out.getvalue().splitlines()[-1]
+
+
+def get_key_client(raw_key):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Api-Key {raw_key}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18APIKeys:
+
+    ME_URL = '/api/v1/users/me/'
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def test_01_key_is_stored_hashed(self, admin, key_caches):
+        from users.models import APIKey
+
+        raw_key = create_key(admin.username)
+        api_key = APIKey.objects.get(user=admin)
+        prefix, secret = raw_key.split('.', 1)
+        assert api_key.prefix == prefix
+        assert secret not in api_key.hashed_secret, (
+            'Секрет API-ключа не должен храниться в базе в открытом виде.'
+        )
+        assert api_key.scope_set == {APIKey.READ}
+
+    def test_02_verified_key_skips_database(self, admin, key_caches,
+                                            django_assert_num_queries):
+        client = get_key_client(create_key(admin.username))
+        response = client.get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == admin.username
+
+        with django_assert_num_queries(0):
+            response = client.get(self.ME_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверенный ключ и его пользователь должны браться из кеша '
+            'процесса без запросов к базе.'
+        )
+
+    def test_03_invalid_and_revoked_keys(self, admin, key_caches):
+        from users.models import APIKey
+
+        raw_key = create_key(admin.username)
+        prefix = raw_key.split('.', 1)[0]
+        wrong = get_key_client(f'{prefix}.wrong-secret')
+        assert wrong.get(self.ME_URL).status_code == HTTPStatus.UNAUTHORIZED
+
+        client = get_key_client(raw_key)
+        assert client.get(self.ME_URL).status_code == HTTPStatus.OK
+        api_key = APIKey.objects.get(prefix=prefix)
+        api_key.is_active = False
+        api_key.save()
+        assert client.get(self.ME_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Отозванный ключ должен сразу перестать приниматься.'
+
+    def test_04_scopes(self, admin, key_caches):
+        read_client = get_key_client(create_key(admin.username))
+        data = {'name': 'Ключевая', 'slug': 'key-category'}
+        response = read_client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Ключ с областью `read` не должен разрешать изменения.'
+        )
+
+        write_client = get_key_client(
+            create_key(admin.username, 'read', 'write')
+        )
+        response = write_client.post(self.CATEGORIES_URL, data=data)
+        assert response.status_code == HTTPStatus.CREATED
+
+    def test_05_usage_flushed_in_batches(self, admin, key_caches, settings):
+        from users.models import APIKey
+
+        settings.API_KEY_USAGE_FLUSH_SIZE = 3
+        raw_key = create_key(admin.username)
+        client = get_key_client(raw_key)
+        for _ in range(2):
+            client.get(self.ME_URL)
+        api_key = APIKey.objects.get(prefix=raw_key.split('.', 1)[0])
+        assert api_key.usage_count == 0, (
+            'Счётчик использования должен записываться пачками.'
+        )
+        client.get(self.ME_URL)
+        api_key.refresh_from_db()
+        assert api_key.usage_count == 3
+        assert api_key.last_used_at is not None
+
+    def test_06_prefix_collision_is_regenerated(self, admin, monkeypatch):
+        from users import models
+        from users.models import APIKey
+
+        prefixes = iter(('aaaaaaaa', 'aaaaaaaa', 'bbbbbbbb'))
+        monkeypatch.setattr(
+            models.secrets, 'token_hex', lambda nbytes: next(prefixes)
+        )
+        APIKey.objects.create_key(admin, 'first', [APIKey.READ])
+        api_key, raw_key = APIKey.objects.create_key(
+            admin, 'second', [APIKey.READ]
+        )
+        assert api_key.prefix == 'bbbbbbbb', (
+            'При совпадении префикса с существующим ключом префикс должен '
+            'генерироваться заново.'
+        )
+        assert raw_key.startswith('bbbbbbbb.')
@@ -0,0 +1,65 @@
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from threading import Barrier
+
+import pytest
+from django.db import connections
+from rest_framework.test import APIClient
+
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+WORKERS = 6
+
+
+def parallel_signups(payloads):
+    barrier = Barrier(len(payloads))
+
+    def post(data):
+        try:
+            barrier.wait()
+            return APIClient().post(URL_SIGNUP, data=data)
+        finally:
+            connections.close_all()
+
+    with ThreadPoolExecutor(max_workers=len(payloads)) as executor:
+        return list(executor.map(post, payloads))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ConcurrentSignup:
+
+    def test_01_same_user(self, django_user_model):
+        data = {'username': 'racer', 'email': 'racer@yamdb.fake'}
+        responses = parallel_signups([data] * WORKERS)
+        assert [response.status_code for response in responses] == (
+            [HTTPStatus.OK] * WORKERS
+        ), (
+            'Параллельные регистрации с одинаковыми данными должны '
+            'завершаться успешно.'
+        )
+        assert django_user_model.objects.filter(username='racer').count() == 1
+
+    def test_02_same_username_different_emails(self, django_user_model):
+        payloads = [
+            {'username': 'racer', 'email': f'racer_{idx}@yamdb.fake'}
+            for idx in range(WORKERS)
+        ]
+        responses = parallel_signups(payloads)
+        codes = sorted(response.status_code for response in responses)
+        assert codes == (
+            [HTTPStatus.OK] + [HTTPStatus.BAD_REQUEST] * (WORKERS - 1)
+        ), (
+            'Из параллельных регистраций одного имени с разными email '
+            'успешной должна быть ровно одна, остальные - ответ 400.'
+        )
+        errors = {
+            str(response.json()) for response in responses
+            if response.status_code == HTTPStatus.BAD_REQUEST
+        }
+        assert len(errors) == 1, 'Ошибка конфликта должна быть одинаковой.'
+        user = django_user_model.objects.get(username='racer')
+        winner = next(
+            payload for payload, response in zip(payloads, responses)
+            if response.status_code == HTTPStatus.OK
+        )
+        assert user.email == winner['email']
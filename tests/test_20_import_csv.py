@@ -0,0 +1,321 @@
+import csv
+import os
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+FILES = (
+    ('users.csv', 'user'),
+    ('category.csv', 'category'),
+    ('genre.csv', 'genre'),
+    ('titles.csv', 'title'),
+    ('review.csv', 'review'),
+    ('comments.csv', 'comment'),
+)
+
+
+def import_file(file_name, model, *args):
+    out = StringIO()
+    call_command(
+        'import_csv', os.path.join(DATA_DIR, file_name), model, *args,
+        stdout=out
+    )
+    return out.getvalue()
+
+
+def count_rows(file_name):
+    with open(os.path.join(DATA_DIR, file_name), encoding='utf-8') as file:
+        return sum(1 for _ in csv.DictReader(file))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20ImportCSV:
+
+    def test_01_import_static_data(self):
+        from reviews.models import Comment, Review, Title
+
+        for file_name, model in FILES:
+            output = import_file(file_name, model)
+            assert f'{count_rows(file_name)} rows' in output
+            assert 'rows/s' in output
+
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv')
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Дата публикации должна браться из файла.'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        assert title.rating_count == title.reviews.count(), (
+            'После импорта отзывов рейтинги должны быть пересчитаны.'
+        )
+
+    def test_02_queries_do_not_grow_with_rows(self):
+        for file_name, model in FILES[:4]:
+            import_file(file_name, model)
+
+        with CaptureQueriesContext(connection) as context:
+            import_file('review.csv', 'review', '--batch-size', '1000')
+        # BEGIN, проверка title_id и author_id, вставка, пересчёт
+        # рейтингов и версий - число запросов не зависит от числа строк.
+        assert len(context.captured_queries) <= 6, (
+            'Импорт не должен выполнять запросы для каждой строки файла.'
+        )
+
+    def test_03_missing_foreign_key(self, tmp_path):
+        from reviews.models import Title
+
+        path = tmp_path / 'titles.csv'
+        path.write_text(
+            'id,name,year,category\n1,Первое,1994,\n2,Второе,1972,999\n',
+            encoding='utf-8'
+        )
+        with pytest.raises(CommandError, match='Row 2: Category'):
+            call_command('import_csv', str(path), 'title', stdout=StringIO())
+        assert not Title.objects.exists(), (
+            'Ошибка в файле должна откатывать весь импорт.'
+        )
+
+    def test_04_genre_title_links(self):
+        from reviews.models import Title
+
+        for file_name, model in FILES[1:4]:
+            import_file(file_name, model)
+
+        with CaptureQueriesContext(connection) as context:
+            import_file('genre_title.csv', 'genre_title')
+        # BEGIN, загрузка id произведений и жанров, вставка связей и
+        # обновление версий произведений.
+        assert len(context.captured_queries) <= 5, (
+            'Связи жанров должны загружаться пачками, без запросов на '
+            'каждую строку.'
+        )
+        links = Title.genre.through.objects.count()
+        assert links == count_rows('genre_title.csv')
+
+        import_file('genre_title.csv', 'genre_title')
+        assert Title.genre.through.objects.count() == links, (
+            'Повторный импорт не должен дублировать связи.'
+        )
+
+    def test_05_genre_title_missing_genre(self, tmp_path):
+        for file_name, model in FILES[1:4]:
+            import_file(file_name, model)
+        path = tmp_path / 'genre_title.csv'
+        path.write_text(
+            'id,title_id,genre_id\n1,1,1\n2,1,999\n', encoding='utf-8'
+        )
+        with pytest.raises(CommandError, match='Row 2: Genre'):
+            call_command(
+                'import_csv', str(path), 'genre_title', stdout=StringIO()
+            )
+
+    def test_06_import_all(self):
+        from reviews.models import Comment, Review, Title
+
+        out = StringIO()
+        call_command('import_all', DATA_DIR, stdout=out)
+        output = out.getvalue()
+        assert 'Data imported successfully' in output
+        assert Review.objects.count() == count_rows('review.csv')
+        assert Comment.objects.count() == count_rows('comments.csv')
+        assert Title.genre.through.objects.count() == (
+            count_rows('genre_title.csv')
+        )
+        # Рейтинги пересчитаны после загрузки отзывов.
+        call_command('rebuild_ratings', '--check', stdout=StringIO())
+
+    def test_07_import_levels(self):
+        from reviews.management.commands.import_all import get_import_levels
+        from reviews.management.commands.import_csv import IMPORTERS
+
+        levels = get_import_levels(list(IMPORTERS.values()))
+        names = [
+            sorted(importer.file_name for importer in level)
+            for level in levels
+        ]
+        assert names == [
+            ['category.csv', 'genre.csv', 'users.csv'],
+            ['titles.csv'],
+            ['genre_title.csv', 'review.csv'],
+            ['comments.csv'],
+        ]
+
+    def test_08_upsert_and_dry_run(self, tmp_path):
+        from reviews.models import Category, Title
+
+        for file_name, model in FILES[1:4]:
+            import_file(file_name, model)
+        title = Title.objects.get(pk=1)
+        path = tmp_path / 'titles.csv'
+        path.write_text(
+            'id,name,year,category\n'
+            f'1,Новое название,{title.year},{title.category_id}\n'
+            f'2,{Title.objects.get(pk=2).name},'
+            f'{Title.objects.get(pk=2).year},'
+            f'{Title.objects.get(pk=2).category_id}\n'
+            f'1000,Новое произведение,2000,{Category.objects.first().pk}\n',
+            encoding='utf-8'
+        )
+
+        output = import_file(str(path), 'title', '--mode', 'upsert',
+                             '--dry-run')
+        assert 'inserted 1, unchanged 1, updated 1' in output
+        assert not Title.objects.filter(pk=1000).exists(), (
+            'Пробный запуск не должен менять данные.'
+        )
+        assert Title.objects.get(pk=1).name == title.name
+
+        import_file(str(path), 'title')
+        assert Title.objects.get(pk=1).name == title.name, (
+            'В режиме ignore существующие строки не обновляются.'
+        )
+
+        import_file(str(path), 'title', '--mode', 'upsert')
+        updated = Title.objects.get(pk=1)
+        assert updated.name == 'Новое название'
+        assert updated.version > title.version, (
+            'Обновлённое произведение должно получить новую версию.'
+        )
+        assert updated.rating_sum == title.rating_sum
+
+    def test_09_upsert_user_role_revokes_tokens(self, tmp_path):
+        from users.models import User
+
+        import_file('users.csv', 'user')
+        user = User.objects.get(pk=100)
+        path = tmp_path / 'users.csv'
+        path.write_text(
+            'id,username,email,role\n'
+            f'100,{user.username},{user.email},moderator\n',
+            encoding='utf-8'
+        )
+        output = import_file(str(path), 'user', '--mode', 'upsert')
+        assert 'updated 1' in output
+        updated = User.objects.get(pk=100)
+        assert updated.role == 'moderator'
+        assert updated.auth_version == user.auth_version + 1
+        assert updated.bio == user.bio
+
+    def test_10_upsert_name_slug_touches_titles(self, tmp_path):
+        from reviews.models import Category, Genre, Title
+
+        for file_name, model in FILES[1:4]:
+            import_file(file_name, model)
+        import_file('genre_title.csv', 'genre_title')
+        category = Category.objects.get(pk=1)
+        genre = Genre.objects.get(pk=1)
+        versions = dict(Title.objects.values_list('id', 'version'))
+
+        for file_name, model, instance in (
+            ('category.csv', 'category', category),
+            ('genre.csv', 'genre', genre),
+        ):
+            path = tmp_path / file_name
+            path.write_text(
+                'id,name,slug\n'
+                f'{instance.pk},Новое имя,{instance.slug}\n',
+                encoding='utf-8'
+            )
+            output = import_file(str(path), model, '--mode', 'upsert')
+            assert 'updated 1' in output
+
+        touched = set(
+            Title.objects.filter(category=category).values_list(
+                'id', flat=True)
+        ) | set(
+            Title.objects.filter(genre=genre).values_list('id', flat=True)
+        )
+        assert touched
+        for title_id, version in Title.objects.values_list('id', 'version'):
+            if title_id in touched:
+                assert version > versions[title_id], (
+                    'Переименование категории или жанра при импорте должно '
+                    'менять версии их произведений для сброса ETag.'
+                )
+            else:
+                assert version == versions[title_id]
+
+    def test_11_parallel_import_reports_committed_files(self, tmp_path,
+                                                        monkeypatch):
+        from reviews.models import Category, Title
+
+        (tmp_path / 'category.csv').write_text(
+            'id,name,slug\n1,Фильм,movie\n', encoding='utf-8'
+        )
+        (tmp_path / 'titles.csv').write_text(
+            'id,name,year,category\n1,Произведение,2000,100\n',
+            encoding='utf-8'
+        )
+        # Параллельная загрузка по файлам выключена только для SQLite.
+        monkeypatch.setattr(connection, 'vendor', 'parallel')
+        err = StringIO()
+        with pytest.raises(CommandError):
+            call_command(
+                'import_all', str(tmp_path), '--workers', '2',
+                stdout=StringIO(), stderr=err
+            )
+        assert 'Committed before failure: category.csv' in err.getvalue(), (
+            'При ошибке параллельной загрузки команда должна перечислять '
+            'уже загруженные файлы.'
+        )
+        assert Category.objects.filter(slug='movie').exists()
+        assert not Title.objects.exists()
+
+    def test_12_incremental_import_touches_only_its_titles(self, tmp_path):
+        from reviews.models import Review, Title
+
+        for file_name, model in FILES:
+            import_file(file_name, model)
+        review = Review.objects.first()
+        versions = dict(Title.objects.values_list('id', 'version'))
+
+        path = tmp_path / 'review.csv'
+        path.write_text(
+            'id,title_id,text,author,score\n'
+            f'{review.pk},{review.title_id},Новый текст,'
+            f'{review.author_id},{review.score % 10 + 1}\n',
+            encoding='utf-8'
+        )
+        import_file(str(path), 'review', '--mode', 'upsert')
+        path = tmp_path / 'genre_title.csv'
+        path.write_text(
+            f'id,title_id,genre_id\n1000,{review.title_id},1\n',
+            encoding='utf-8'
+        )
+        import_file(str(path), 'genre_title')
+
+        changed = {
+            title_id for title_id, version
+            in Title.objects.values_list('id', 'version')
+            if version != versions[title_id]
+        }
+        assert changed == {review.title_id}, (
+            'Импорт нескольких строк должен менять версии только их '
+            'произведений.'
+        )
+        call_command('rebuild_ratings', '--check', stdout=StringIO())
+
+    def test_13_pub_date_defaults_to_import_time(self, tmp_path):
+        from django.utils import timezone
+
+        from reviews.models import Review
+
+        for file_name, model in FILES[:4]:
+            import_file(file_name, model)
+        path = tmp_path / 'review.csv'
+        path.write_text(
+            'id,title_id,text,author,score\n1000,1,Отзыв,100,5\n',
+            encoding='utf-8'
+        )
+        started = timezone.now()
+        import_file(str(path), 'review')
+        assert Review.objects.get(pk=1000).pub_date >= started, (
+            'Без колонки pub_date дата отзыва должна быть временем импорта.'
+        )
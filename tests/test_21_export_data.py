@@ -0,0 +1,82 @@
+import csv
+import gzip
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def export(*args):
+    out, err = StringIO(), StringIO()
+    call_command('export_data', *args, stdout=out, stderr=err)
+    return out.getvalue(), err.getvalue()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ExportData:
+
+    @pytest.fixture(autouse=True)
+    def data(self):
+        call_command('import_all', DATA_DIR, stdout=StringIO())
+
+    def test_01_csv_roundtrip(self, tmp_path):
+        from reviews.models import Review
+
+        path = tmp_path / 'review.csv'
+        _, summary = export('review', '--output', str(path))
+        assert f'Exported {Review.objects.count()} rows' in summary
+
+        with open(path, encoding='utf-8') as file:
+            rows = list(csv.DictReader(file))
+        assert len(rows) == Review.objects.count()
+        assert set(rows[0]) == {
+            'id', 'title_id', 'text', 'author', 'score', 'pub_date'
+        }, 'Колонки выгрузки должны совпадать с колонками импорта.'
+
+        Review.objects.all().delete()
+        call_command('import_csv', str(path), 'review', stdout=StringIO())
+        assert Review.objects.count() == len(rows)
+        assert Review.objects.get(pk=1).pub_date.year == 2019
+
+    def test_02_ndjson_to_stdout(self):
+        from reviews.models import Title
+
+        output, _ = export('title', '--format', 'ndjson')
+        lines = output.splitlines()
+        assert len(lines) == Title.objects.count()
+        first = json.loads(lines[0])
+        assert first['id'] == Title.objects.order_by('pk').first().pk
+        assert set(first) == {
+            'id', 'name', 'year', 'description', 'category'
+        }
+
+    def test_03_resume_by_id_range(self, tmp_path):
+        from reviews.models import Comment
+
+        path = tmp_path / 'comments.csv.gz'
+        ids = list(Comment.objects.order_by('pk').values_list('pk', flat=True))
+        middle = ids[len(ids) // 2]
+        _, summary = export(
+            'comment', '--output', str(path), '--end-id', str(middle)
+        )
+        assert f'last id: {middle}' in summary
+        export(
+            'comment', '--output', str(path), '--append',
+            '--start-id', str(middle + 1)
+        )
+        with gzip.open(path, 'rt', encoding='utf-8', newline='') as file:
+            rows = list(csv.DictReader(file))
+        assert [int(row['id']) for row in rows] == ids, (
+            'Дозапись по диапазону id должна давать полную выгрузку без '
+            'повторного заголовка.'
+        )
+
+    def test_04_streams_in_chunks(self, django_assert_max_num_queries):
+        with django_assert_max_num_queries(1):
+            export('genre_title', '--chunk-size', '10')
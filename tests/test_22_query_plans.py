@@ -0,0 +1,67 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+
+INDEXED_QUERIES = {
+    'title-list': 'title_year_idx',
+    'title-category': 'title_category_year_idx',
+    'title-reviews': 'review_title_pub_date_idx',
+    'review-comments': 'comment_review_pub_date_idx',
+}
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='Планы запросов проверяются в SQLite'
+)
+@pytest.mark.django_db(transaction=True)
+class Test22QueryPlans:
+
+    @pytest.mark.parametrize('name', INDEXED_QUERIES)
+    def test_01_queries_use_ordered_index(self, name):
+        from reviews.management.commands.benchmark import (
+            get_benchmark_queries, seed)
+
+        queryset = get_benchmark_queries(**seed(50, 2))[name]
+        plan = queryset.explain()
+        assert INDEXED_QUERIES[name] in plan, (
+            f'Запрос `{name}` должен использовать индекс '
+            f'`{INDEXED_QUERIES[name]}`, план:\n{plan}'
+        )
+        assert 'TEMP B-TREE' not in plan, (
+            f'Запрос `{name}` не должен сортировать строки, план:\n{plan}'
+        )
+
+    @pytest.mark.parametrize(
+        'name', ('title-genre', 'title-genres-any', 'title-genres-all')
+    )
+    def test_02_genre_filter_reads_ordered_index(self, name):
+        from reviews.management.commands.benchmark import (
+            get_benchmark_queries, seed)
+
+        plan = get_benchmark_queries(**seed(50, 2))[name].explain()
+        assert 'title_year_idx' in plan, (
+            f'Отбор по жанрам `{name}` должен идти по индексу сортировки, '
+            f'план:\n{plan}'
+        )
+        assert 'TEMP B-TREE' not in plan, (
+            f'Отбор по жанрам `{name}` не должен сортировать и '
+            f'группировать строки, план:\n{plan}'
+        )
+
+    def test_03_benchmark_command(self):
+        from reviews.models import Title
+
+        out = StringIO()
+        call_command(
+            'benchmark', '--titles', '20', '--repeat', '1', '--compare',
+            stdout=out
+        )
+        output = out.getvalue()
+        assert 'Without API indexes:' in output
+        assert 'TEMP B-TREE' in output.split('Without API indexes:')[1]
+        assert not Title.objects.exists(), (
+            'Без --keep данные бенчмарка должны откатываться.'
+        )
@@ -0,0 +1,127 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    @staticmethod
+    def create_titles():
+        from reviews.models import Title
+
+        return {
+            'matrix': Title.objects.create(
+                name='Матрица', year=1999,
+                description='Хакер узнаёт правду о мире.'
+            ),
+            'hacker': Title.objects.create(
+                name='Хакеры', year=1995,
+                description='Подростки взламывают корпорацию.'
+            ),
+            'dune': Title.objects.create(
+                name='Дюна', year=2021, description='Пустынная планета.'
+            ),
+        }
+
+    def search(self, client, query):
+        response = client.get(self.TITLES_URL, {'search': query})
+        assert response.status_code == 200
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_search_by_name_and_description(self, client):
+        titles = self.create_titles()
+        assert self.search(client, 'дюна') == [titles['dune'].id]
+        assert self.search(client, 'планета') == [titles['dune'].id], (
+            'Поиск должен учитывать описание произведения.'
+        )
+        assert self.search(client, 'планета матрица') == [], (
+            'Результат поиска должен содержать все слова запроса.'
+        )
+
+    @pytest.mark.skipif(
+        connection.vendor not in ('sqlite', 'postgresql'),
+        reason='Полнотекстовый поиск есть в SQLite и PostgreSQL'
+    )
+    def test_02_prefix_matching_and_rank(self, client):
+        titles = self.create_titles()
+        assert self.search(client, 'хакер') == [
+            titles['hacker'].id, titles['matrix'].id
+        ], (
+            'Совпадение в названии должно быть выше совпадения в описании, '
+            'слова запроса ищутся по префиксу.'
+        )
+        assert self.search(client, '"дюн*') == [titles['dune'].id], (
+            'Операторы полнотекстового поиска в запросе не должны '
+            'вызывать ошибку.'
+        )
+
+    def test_03_index_follows_changes(self, client):
+        from reviews.models import Title
+
+        titles = self.create_titles()
+        dune = titles['dune']
+        dune.name = 'Солярис'
+        dune.save()
+        assert self.search(client, 'дюна') == []
+        assert self.search(client, 'солярис') == [dune.id]
+
+        Title.objects.filter(pk=titles['matrix'].pk).update(name='Начало')
+        assert self.search(client, 'начало') == [titles['matrix'].id], (
+            'Индекс должен обновляться и при QuerySet.update.'
+        )
+        Title.objects.bulk_create([Title(name='Сталкер', year=1979)])
+        assert len(self.search(client, 'сталкер')) == 1
+
+        dune.delete()
+        assert self.search(client, 'солярис') == []
+
+    def test_04_search_combines_with_filters(self, client):
+        titles = self.create_titles()
+        assert self.search(client, '') == [
+            title.id for title in sorted(
+                titles.values(), key=lambda title: -title.year)
+        ]
+        response = client.get(
+            self.TITLES_URL, {'search': 'хакер', 'year': 1999}
+        )
+        assert [
+            title['id'] for title in response.json()['results']
+        ] == [titles['matrix'].id]
+
+    @pytest.mark.skipif(
+        connection.vendor not in ('sqlite', 'postgresql'),
+        reason='Полнотекстовый поиск есть в SQLite и PostgreSQL'
+    )
+    def test_05_rebuild_search_index(self, client):
+        from reviews.search import BACKENDS
+
+        titles = self.create_titles()
+        with connection.cursor() as cursor:
+            BACKENDS[connection.vendor].uninstall(cursor)
+        call_command('rebuild_search_index', stdout=StringIO())
+        assert self.search(client, 'матрица') == [titles['matrix'].id]
+
+    @pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='Триггеры индекса есть только в SQLite'
+    )
+    def test_06_migrate_restores_dropped_triggers(self, client):
+        from reviews.search import BACKENDS, FTS_TRIGGERS
+
+        backend = BACKENDS['sqlite']
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {FTS_TRIGGERS[0]}')
+        assert not backend.is_installed(), (
+            'Индекс без триггеров не должен считаться установленным.'
+        )
+        call_command('migrate', verbosity=0)
+        assert backend.is_installed(), (
+            'migrate должен восстанавливать потерянные триггеры индекса.'
+        )
+        titles = self.create_titles()
+        assert self.search(client, 'матрица') == [titles['matrix'].id]
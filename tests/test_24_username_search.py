@@ -0,0 +1,86 @@
+import os
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24UsernameSearch:
+
+    USERS_URL = '/api/v1/users/'
+    USERNAMES = ('ivanov', 'Ivanova', 'petr_ivan', 'sidorov')
+
+    def create_users(self, django_user_model):
+        for username in self.USERNAMES:
+            django_user_model.objects.create_user(
+                username=username, email=f'{username}@yamdb.fake'
+            )
+
+    def search(self, client, query):
+        response = client.get(self.USERS_URL, {'search': query})
+        assert response.status_code == 200
+        return {user['username'] for user in response.json()['results']}
+
+    def test_01_prefix_search(self, admin_client, django_user_model):
+        self.create_users(django_user_model)
+        assert self.search(admin_client, 'ivan*') == {'ivanov'}, (
+            'Запрос `q*` должен находить username, начинающиеся с `q`.'
+        )
+
+    def test_02_infix_search(self, admin_client, django_user_model):
+        self.create_users(django_user_model)
+        assert self.search(admin_client, 'van') == {
+            'ivanov', 'Ivanova', 'petr_ivan'
+        }, 'Поиск по подстроке username не должен учитывать регистр.'
+        assert self.search(admin_client, 'ivano') == {'ivanov', 'Ivanova'}
+        assert self.search(admin_client, 'vano_') == set(), (
+            'Совпадение всех n-грамм запроса не означает вхождения подстроки.'
+        )
+
+    def test_03_index_follows_changes(self, admin_client, client,
+                                      django_user_model):
+        from users.models import UsernameTrigram
+
+        self.create_users(django_user_model)
+        response = admin_client.patch(
+            f'{self.USERS_URL}sidorov/', data={'username': 'kuznetsov'}
+        )
+        assert response.status_code == 200
+        assert self.search(admin_client, 'dorov') == set()
+        assert self.search(admin_client, 'znets') == {'kuznetsov'}
+
+        client.post('/api/v1/auth/signup/', data={
+            'username': 'smirnov', 'email': 'smirnov@yamdb.fake'
+        })
+        assert self.search(admin_client, 'mirno') == {'smirnov'}, (
+            'Пользователь, созданный при регистрации, должен находиться.'
+        )
+
+        admin_client.delete(f'{self.USERS_URL}smirnov/')
+        assert not UsernameTrigram.objects.filter(gram='mir').exists()
+
+    def test_04_imported_users_are_indexed(self, admin_client):
+        from users.models import UsernameTrigram
+
+        call_command(
+            'import_csv',
+            os.path.join(settings.BASE_DIR, 'static', 'data', 'users.csv'),
+            'user'
+        )
+        assert self.search(admin_client, 'obvio') == {'capt_obvious'}
+
+        UsernameTrigram.objects.all().delete()
+        UsernameTrigram.objects.rebuild(batch_size=2)
+        assert self.search(admin_client, 'obvio') == {'capt_obvious'}
+
+    def test_05_short_search_ignores_case(self, admin_client,
+                                          django_user_model):
+        self.create_users(django_user_model)
+        assert self.search(admin_client, 'Iv') == {
+            'ivanov', 'Ivanova', 'petr_ivan'
+        }, (
+            'Запрос короче n-граммы должен искать подстроку без учёта '
+            'регистра, как и длинные запросы.'
+        )
+        assert self.search(admin_client, 'OR') == {'sidorov'}
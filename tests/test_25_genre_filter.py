@@ -0,0 +1,99 @@
+import pytest
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25GenreFilter:
+
+    TITLES_URL = '/api/v1/titles/'
+    GENRES_URL = '/api/v1/genres/'
+
+    @staticmethod
+    def create_titles():
+        from reviews.models import Genre, Title
+
+        drama = Genre.objects.create(name='Драма', slug='drama')
+        comedy = Genre.objects.create(name='Комедия', slug='comedy')
+        Genre.objects.create(name='Ужасы', slug='horror')
+        titles = {
+            'both': Title.objects.create(name='Оба', year=2001),
+            'drama': Title.objects.create(name='Драма', year=2002),
+            'comedy': Title.objects.create(name='Комедия', year=2003),
+        }
+        titles['both'].genre.set((drama, comedy))
+        titles['drama'].genre.set((drama,))
+        titles['comedy'].genre.set((comedy,))
+        return titles
+
+    def filter_titles(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == 200
+        data = response.json()
+        ids = [title['id'] for title in data['results']]
+        assert data['count'] == len(ids) == len(set(ids)), (
+            'Фильтр по жанрам не должен размножать произведения.'
+        )
+        return set(ids)
+
+    def test_01_any_and_all_genres(self, client):
+        titles = self.create_titles()
+        assert self.filter_titles(client, genre='drama,comedy') == {
+            titles['both'].id, titles['drama'].id, titles['comedy'].id
+        }
+        assert self.filter_titles(
+            client, genre='drama,comedy', genre_match='all'
+        ) == {titles['both'].id}
+        assert self.filter_titles(
+            client, genre='drama,horror', genre_match='all'
+        ) == set()
+        assert self.filter_titles(client, genre=' DRAMA ,') == {
+            titles['both'].id, titles['drama'].id
+        }, 'Слаги в фильтре не должны зависеть от регистра и пробелов.'
+
+    def test_02_unknown_genre_match(self, client):
+        response = client.get(
+            self.TITLES_URL, {'genre': 'drama', 'genre_match': 'some'}
+        )
+        assert response.status_code == 400
+
+    def test_03_slugs_are_lowercase(self, admin_client):
+        from reviews.models import Genre
+
+        response = admin_client.post(
+            self.GENRES_URL, data={'name': 'Ужасы', 'slug': 'Horror'}
+        )
+        assert response.status_code == 201
+        assert Genre.objects.get().slug == 'horror'
+        response = admin_client.post(
+            self.GENRES_URL, data={'name': 'Ужасы', 'slug': 'HORROR'}
+        )
+        assert response.status_code == 400, (
+            'Слаг, отличающийся от существующего только регистром, должен '
+            'считаться занятым.'
+        )
+
+    def test_04_lowercase_migration_reports_case_duplicates(self):
+        from importlib import import_module
+
+        from django.apps import apps
+        from reviews.models import Category, Genre
+
+        migration = import_module('reviews.migrations.0010_lowercase_slugs')
+        Category.objects.create(name='Фильмы', slug='movie')
+        Category.objects.filter(slug='movie').update(slug='Movie')
+        for slug in ('drama', 'comedy', 'horror'):
+            Genre.objects.create(name=slug, slug=slug)
+        Genre.objects.filter(slug='comedy').update(slug='Drama')
+
+        with pytest.raises(RuntimeError) as error:
+            migration.lowercase_slugs(apps, None)
+        assert 'Drama, drama' in str(error.value), (
+            'Миграция должна перечислять слаги, совпадающие без учёта '
+            'регистра, а не падать с IntegrityError.'
+        )
+
+        Genre.objects.filter(slug='Drama').update(slug='Comedy')
+        migration.lowercase_slugs(apps, None)
+        assert set(Genre.objects.values_list('slug', flat=True)) == {
+            'drama', 'comedy', 'horror'
+        }
+        assert Category.objects.get().slug == 'movie'
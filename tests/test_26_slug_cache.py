@@ -0,0 +1,137 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def get_slug_lookups(queries):
+    return [
+        query['sql'] for query in queries.captured_queries
+        if '"slug" =' in query['sql'] or '"slug" IN' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26SlugCache:
+
+    TITLES_URL = '/api/v1/titles/'
+    GENRES_URL = '/api/v1/genres/'
+
+    @staticmethod
+    def create_catalog():
+        from reviews.models import Category, Genre
+
+        Category.objects.create(name='Фильм', slug='films')
+        Genre.objects.create(name='Драма', slug='drama')
+        Genre.objects.create(name='Комедия', slug='comedy')
+
+    def post_title(self, client, **data):
+        return client.post(self.TITLES_URL, data={
+            'name': 'Произведение', 'year': 2000, 'category': 'films',
+            'genre': ['drama', 'comedy'], **data
+        })
+
+    def test_01_title_write_does_not_look_up_slugs(self, admin_client):
+        self.create_catalog()
+        assert self.post_title(admin_client).status_code == 201
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_title(admin_client, genre=['Drama'])
+        assert response.status_code == 201
+        assert response.json()['category'] == {
+            'name': 'Фильм', 'slug': 'films'
+        }
+        assert [genre['slug'] for genre in response.json()['genre']] == [
+            'drama'
+        ]
+        lookups = get_slug_lookups(queries)
+        assert not lookups, (
+            'Слаги категории и жанров при записи произведения должны '
+            f'находиться по кешу, выполнены запросы: {lookups}'
+        )
+
+    def test_02_cache_follows_saves_and_deletes(self, admin_client):
+        from reviews.models import Genre
+
+        self.create_catalog()
+        assert self.post_title(admin_client).status_code == 201
+        response = admin_client.post(
+            self.GENRES_URL, data={'name': 'Ужасы', 'slug': 'horror'}
+        )
+        assert response.status_code == 201
+        assert self.post_title(
+            admin_client, genre=['horror']
+        ).status_code == 201, 'Новый жанр должен сразу попадать в кеш.'
+
+        admin_client.delete(f'{self.GENRES_URL}comedy/')
+        assert self.post_title(
+            admin_client, genre=['comedy']
+        ).status_code == 400, 'Удалённый жанр должен пропадать из кеша.'
+
+        genre = Genre.objects.get(slug='drama')
+        genre.slug = 'melodrama'
+        genre.save()
+        response = admin_client.get(self.TITLES_URL, {'genre': 'melodrama'})
+        assert response.json()['count'] == 1
+
+    def test_03_filters_use_ids(self, client):
+        from reviews.models import Genre, Title
+
+        self.create_catalog()
+        title = Title.objects.create(name='Фильм', year=2000)
+        title.genre.set(Genre.objects.filter(slug='drama'))
+        for params, count, missing in (
+            ({'category': 'films'}, 0, False),
+            ({'genre': 'drama'}, 1, False),
+            ({'category': 'unknown'}, 0, True),
+            ({'genre': 'drama,unknown'}, 1, True),
+            ({'genre': 'drama,unknown', 'genre_match': 'all'}, 0, True),
+        ):
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(self.TITLES_URL, params)
+            assert response.status_code == 200
+            assert response.json()['count'] == count, params
+            if not missing:
+                assert not get_slug_lookups(queries), (
+                    f'Фильтр {params} должен сравнивать id, а не слаги.'
+                )
+
+    def test_04_shared_cache(self, settings, django_assert_num_queries):
+        from api.cache import genre_slugs
+
+        settings.API_SLUG_CACHE_SHARED = True
+        self.create_catalog()
+        assert genre_slugs.get_id('drama') is not None
+        genre_slugs.clear()
+        with django_assert_num_queries(0):
+            assert genre_slugs.get_instance('comedy').name == 'Комедия', (
+                'С API_SLUG_CACHE_SHARED справочник должен читаться из '
+                'общего кеша.'
+            )
+
+    def test_05_rows_changed_elsewhere(self, admin_client, settings,
+                                       monkeypatch):
+        from api import cache
+        from api.cache import genre_slugs
+        from reviews.models import Genre
+
+        self.create_catalog()
+        assert genre_slugs.get_id('drama') is not None
+        # bulk_create и удаление сырым запросом не сдвигают поколение, как
+        # и изменения в другом процессе при кеше в памяти процесса.
+        Genre.objects.bulk_create([Genre(name='Ужасы', slug='horror')])
+        assert self.post_title(
+            admin_client, genre=['horror']
+        ).status_code == 201, (
+            'Слаг, которого нет в кеше, должен искаться в базе.'
+        )
+
+        Genre.objects.filter(slug='comedy')._raw_delete(Genre.objects.db)
+        monotonic = time.monotonic() + settings.API_SLUG_CACHE_TTL
+        monkeypatch.setattr(
+            cache, 'time', SimpleNamespace(monotonic=lambda: monotonic)
+        )
+        assert genre_slugs.get_id('comedy') is None, (
+            'Справочник должен перечитываться после API_SLUG_CACHE_TTL.'
+        )